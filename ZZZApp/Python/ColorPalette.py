@@ -0,0 +1,140 @@
+import colorsys
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# Pixels per side after downsampling, 64x64 is plenty for a palette
+SAMPLE_SIZE = 64
+# Number of k-means clusters and refinement passes
+PALETTE_SIZE = 6
+KMEANS_ITERATIONS = 8
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+def downsample(pixels: np.ndarray, size: int = SAMPLE_SIZE) -> np.ndarray:
+    """
+    Reduce an (h, w, 3|4) uint8 image to at most size x size RGB samples
+
+    Uses a strided view, no resampling and no copy of the full image.
+    """
+    height, width = pixels.shape[:2]
+    step = max(1, max(height, width) // size)
+    return pixels[::step, ::step, :3]
+
+
+def kmeans(samples: np.ndarray, k: int = PALETTE_SIZE, iterations: int = KMEANS_ITERATIONS):
+    """
+    Vectorized k-means over (n, 3) float32 RGB samples
+
+    Returns:
+        tuple: (centers (k, 3) float32, counts (k,) int) sorted by population
+    """
+    k = min(k, len(samples))
+    # Deterministic seeding: evenly spaced samples along the luminance order
+    luminance = samples @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    order = np.argsort(luminance, kind='stable')
+    centers = samples[order[np.linspace(0, len(samples) - 1, k).astype(int)]].copy()
+
+    # |x - c|^2 = |x|^2 - 2 x.c + |c|^2, and |x|^2 doesn't change the argmin
+    for _ in range(iterations):
+        distances = (centers * centers).sum(axis=1) - 2 * samples @ centers.T
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        populated = counts > 0
+        for channel in range(3):
+            sums = np.bincount(labels, weights=samples[:, channel], minlength=k)
+            centers[populated, channel] = sums[populated] / counts[populated]
+
+    ranking = np.argsort(-counts, kind='stable')
+    return centers[ranking], counts[ranking]
+
+
+def relative_luminance(rgb) -> float:
+    # WCAG 2.x relative luminance of an sRGB colour
+    def channel(value):
+        value = value / 255
+        return value / 12.92 if value <= 0.03928 else ((value + 0.055) / 1.055) ** 2.4
+    r, g, b = rgb
+    return 0.2126 * channel(r) + 0.7152 * channel(g) + 0.0722 * channel(b)
+
+
+def contrast_ratio(first, second) -> float:
+    lighter, darker = sorted((relative_luminance(first), relative_luminance(second)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def text_color_for(background) -> tuple:
+    """White or black, whichever reads better on `background`"""
+    if contrast_ratio(background, WHITE) >= contrast_ratio(background, BLACK):
+        return WHITE
+    return BLACK
+
+
+def to_hex(rgb) -> str:
+    r, g, b = (int(round(min(255, max(0, value)))) for value in rgb)
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+def _adjust(rgb, saturation: Optional[float] = None, lightness: Optional[float] = None) -> tuple:
+    h, l, s = colorsys.rgb_to_hls(*(value / 255 for value in rgb))
+    # A grey has no meaningful hue, saturating it would just produce red
+    if saturation is not None and s > 0.05:
+        s = saturation
+    if lightness is not None:
+        l = lightness
+    return tuple(value * 255 for value in colorsys.hls_to_rgb(h, l, s))
+
+
+def _pick(swatches, population, target_saturation: float, target_lightness: float,
+          min_saturation: float = 0.0, max_saturation: float = 1.0) -> Optional[tuple]:
+    # Score like Android's Palette: close to the target lightness/saturation,
+    # weighted by how much of the cover the colour covers
+    best, best_score = None, -1.0
+    total = max(1, int(population.sum()))
+    for rgb, count in zip(swatches, population):
+        h, l, s = colorsys.rgb_to_hls(*(value / 255 for value in rgb))
+        if not (min_saturation <= s <= max_saturation) or not (0.2 <= l <= 0.85):
+            continue
+        score = (
+            3.0 * (1 - abs(s - target_saturation))
+            + 6.0 * (1 - abs(l - target_lightness))
+            + 1.0 * count / total
+        )
+        if score > best_score:
+            best, best_score = tuple(rgb), score
+    return best
+
+
+def extract_palette(pixels: np.ndarray) -> Dict[str, str]:
+    """
+    Dominant, vibrant and muted swatches of a cover, with readable text colours
+
+    Args:
+        pixels: (h, w, 3|4) uint8 image, e.g. CoverImage.pixels()
+
+    Returns:
+        dict: hex colours for 'dominant', 'vibrant', 'muted' and, for each of
+            them, a '<name>_text' colour with the best contrast on top of it
+    """
+    samples = downsample(pixels).reshape(-1, 3).astype(np.float32)
+    centers, counts = kmeans(samples)
+    swatches = [tuple(center) for center in centers]
+
+    dominant = swatches[0]
+    vibrant = _pick(swatches, counts, 1.0, 0.5, min_saturation=0.35)
+    muted = _pick(swatches, counts, 0.3, 0.5, max_saturation=0.4)
+
+    # Covers without a fitting cluster (greyscale art) get derived swatches
+    if vibrant is None:
+        vibrant = _adjust(dominant, saturation=0.6, lightness=0.6)
+    if muted is None:
+        muted = _adjust(dominant, saturation=0.25, lightness=0.4)
+
+    palette = {}
+    for name, rgb in (('dominant', dominant), ('vibrant', vibrant), ('muted', muted)):
+        palette[name] = to_hex(rgb)
+        palette[f'{name}_text'] = to_hex(text_color_for(rgb))
+    return palette
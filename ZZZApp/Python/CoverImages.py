@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, QStandardPaths, Qt
+from PySide6.QtGui import QImage, QImageReader
+from PySide6.QtQuick import QQuickImageProvider
+from rich import print
+
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+class CoverImage:
+    # One downloaded and decoded cover, shared by every stage that needs it.
+    #
+    # `image` is decoded once into RGBA8888; pixels() exposes the very same
+    # buffer as a NumPy view, so rounding, colour extraction and display all
+    # read one copy of the pixels.
+
+    __slots__ = ('url', 'data', 'image')
+
+    def __init__(self, url: str, data: bytes, image: QImage):
+        self.url = url
+        self.data = data
+        self.image = image
+
+    @property
+    def width(self) -> int:
+        return self.image.width()
+
+    @property
+    def height(self) -> int:
+        return self.image.height()
+
+    def pixels(self) -> np.ndarray:
+        """(height, width, 4) uint8 RGBA view over the QImage buffer, no copy"""
+        height, width = self.image.height(), self.image.width()
+        buffer = np.frombuffer(self.image.constBits(), dtype=np.uint8)
+        # Rows may be padded, drop the padding with a strided view
+        rows = buffer.reshape(height, self.image.bytesPerLine())
+        return rows[:, :width * 4].reshape(height, width, 4)
+
+
+class CoverCache:
+    # Persistent, content-addressed cache for cover files.
+    #
+    # Files are named by a stable SHA-256 of the URL and the render parameters
+    # (unlike hash(), which is salted per process), so they survive restarts.
+    # An in-memory index ordered by last use mirrors the directory and the
+    # least recently used files are evicted once `max_bytes` is exceeded.
+    # Every method touches the disk and is meant to run in an executor
+    # thread, so the index is lock protected.
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = 64 * 1024 * 1024):
+        if directory is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            directory = Path(base or Path.home() / '.cache' / 'ZZZApp') / 'covers'
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self._loadIndex()
+
+    @staticmethod
+    def key(url: str, **params) -> str:
+        """Stable digest of a URL and the parameters it was rendered with"""
+        material = url + ''.join(f"|{name}={params[name]}" for name in sorted(params))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+
+    def _loadIndex(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total += size
+        self._evict()
+
+    def path(self, key: str, suffix: str = '.png') -> Path:
+        """Where the file for `key` lives, whether or not it exists yet"""
+        return self.directory / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = '.png') -> Optional[Path]:
+        """Path of a cached file, marking it as recently used, or None on a miss"""
+        name = f"{key}{suffix}"
+        path = self.directory / name
+        with self._lock:
+            if name not in self._index or not path.exists():
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+            self.hits += 1
+        try:
+            # Persist the recency for the next start
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def read_bytes(self, key: str, suffix: str) -> Optional[bytes]:
+        path = self.get(key, suffix)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes, suffix: str) -> Path:
+        """Store raw bytes atomically and register them in the index"""
+        path = self.path(key, suffix)
+        temp = path.with_name(path.name + '.tmp')
+        temp.write_bytes(data)
+        os.replace(temp, path)
+        self.commit(key, suffix)
+        return path
+
+    def commit(self, key: str, suffix: str = '.png') -> Optional[Path]:
+        """Register a file written directly to path(key), evicting old entries"""
+        name = f"{key}{suffix}"
+        path = self.directory / name
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        with self._lock:
+            self._total += size - self._index.get(name, 0)
+            self._index[name] = size
+            self._index.move_to_end(name)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+
+
+class CoverFetcher:
+    # Downloads each cover URL once.
+    #
+    # Concurrent requests for the same URL join the download already in
+    # flight, and the last few decoded covers are kept so stages that run
+    # right after each other (display, colour) never download twice. With a
+    # CoverCache the original bytes also persist across runs. Covers are
+    # decoded straight to the requested size, so a large variant never
+    # occupies more memory than the display needs.
+
+    def __init__(self, api: AsyncSpotifyClient, cache: Optional[CoverCache] = None, keep: int = 8):
+        self.api = api
+        self.cache = cache
+        self.keep = keep
+        self._downloads: Dict[str, asyncio.Future] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._recent: 'OrderedDict[tuple, CoverImage]' = OrderedDict()
+        self.download_count = 0
+
+    async def fetch(self, url: str, size: Optional[int] = None) -> Optional[CoverImage]:
+        """
+        Get the decoded cover for `url`
+
+        Args:
+            url: cover URL
+            size: longest side in pixels to decode to, None for the original size
+
+        Returns:
+            CoverImage: shared decoded cover, or None if it could not be loaded
+        """
+        if not url:
+            return None
+        key = (url, size)
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return self._recent[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(url, size))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled consumer does not abort the others' download
+        return await asyncio.shield(future)
+
+    async def _data(self, url: str) -> bytes:
+        # One download per URL, whatever sizes it gets decoded to
+        future = self._downloads.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._download(url))
+            self._downloads[url] = future
+            future.add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(future)
+
+    async def _download(self, url: str) -> bytes:
+        # File and cache access stays off the loop, this is on the track change path
+        loop = asyncio.get_event_loop()
+        if url.startswith('file:///'):
+            return await loop.run_in_executor(None, Path(url[8:]).read_bytes)
+        key = CoverCache.key(url, variant='source')
+        data = None
+        if self.cache:
+            data = await loop.run_in_executor(None, self.cache.read_bytes, key, '.img')
+        if data is None:
+            data = await self.api.get_bytes(url)
+            self.download_count += 1
+            if self.cache:
+                try:
+                    await loop.run_in_executor(None, self.cache.put_bytes, key, data, '.img')
+                except OSError as e:
+                    # Still usable, it just gets downloaded again next run
+                    print(f"[bold yellow]Could not cache cover {url}: {e}[/bold yellow]")
+        return data
+
+    async def _load(self, url: str, size: Optional[int]) -> Optional[CoverImage]:
+        try:
+            data = await self._data(url)
+            loop = asyncio.get_event_loop()
+            image = await loop.run_in_executor(None, self._decode, data, size)
+            if image is None:
+                print(f"[bold red]Failed to decode cover: {url}[/bold red]")
+                return None
+        except Exception as e:
+            print(f"[bold red]Error downloading cover {url}: {e}[/bold red]")
+            return None
+
+        cover = CoverImage(url, data, image)
+        self._recent[(url, size)] = cover
+        while len(self._recent) > self.keep:
+            self._recent.popitem(last=False)
+        return cover
+
+    @staticmethod
+    def _decode(data: bytes, size: Optional[int] = None) -> Optional[QImage]:
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer)
+        source_size = reader.size()
+        if size and source_size.isValid() and max(source_size.width(), source_size.height()) > size:
+            # Let the codec scale while decoding (JPEG decodes at 1/2, 1/4, ... directly)
+            reader.setScaledSize(source_size.scaled(size, size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return None
+        return image.convertToFormat(QImage.Format_RGBA8888)
+
+
+class CoverImageProvider(QQuickImageProvider):
+    # Serves decoded covers to QML straight from memory.
+    #
+    # QML loads "image://covers/<key>" and gets the QImage the fetcher already
+    # decoded; corner rounding happens in the scene graph (MultiEffect mask
+    # in Screen01.ui.qml), so nothing is painted, encoded or written to disk
+    # per track. requestImage runs on QML's image loader threads, hence the
+    # lock around the small LRU of published covers.
+
+    PROVIDER_ID = 'covers'
+
+    def __init__(self, keep: int = 8):
+        super().__init__(QQuickImageProvider.Image)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._images: 'OrderedDict[str, QImage]' = OrderedDict()
+
+    def publish(self, cover: CoverImage) -> str:
+        """Make a decoded cover available to QML and return its image:// URL"""
+        key = CoverCache.key(cover.url, width=cover.width)
+        with self._lock:
+            self._images[key] = cover.image
+            self._images.move_to_end(key)
+            while len(self._images) > self.keep:
+                self._images.popitem(last=False)
+        return f"image://{self.PROVIDER_ID}/{key}"
+
+    def requestImage(self, id: str, size: QSize, requestedSize: QSize) -> QImage:
+        with self._lock:
+            image = self._images.get(id)
+        if image is None:
+            return QImage()
+        # Honour the Image's sourceSize when QML asks for a smaller copy
+        if requestedSize.width() > 0 and requestedSize.height() > 0 and requestedSize != image.size():
+            image = image.scaled(requestedSize, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        size.setWidth(image.width())
+        size.setHeight(image.height())
+        return image
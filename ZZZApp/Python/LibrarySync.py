@@ -0,0 +1,266 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QStandardPaths
+from rich import print
+from spotipy import SpotifyException
+
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_tracks (
+    track_id TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    name TEXT NOT NULL,
+    artist TEXT,
+    artist_id TEXT,
+    album TEXT,
+    album_id TEXT,
+    duration_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS saved_tracks_added_at ON saved_tracks (added_at);
+CREATE TABLE IF NOT EXISTS unavailable_items (
+    added_at TEXT PRIMARY KEY
+);
+"""
+COLUMNS = ('track_id', 'added_at', 'uri', 'name', 'artist', 'artist_id', 'album', 'album_id', 'duration_ms')
+
+
+def track_row(item: Dict) -> Optional[tuple]:
+    # One /me/tracks item as a saved_tracks row. Local files have no ID and
+    # are keyed by URI; items without a track at all (pulled from the
+    # catalog) give None and are counted in unavailable_items instead, so
+    # the two tables together still match Spotify's total.
+    track = item.get('track') or {}
+    key = track.get('id') or track.get('uri')
+    if not key:
+        return None
+    artists = track.get('artists') or [{}]
+    album = track.get('album') or {}
+    return (
+        key, item['added_at'], track.get('uri') or f"spotify:track:{key}",
+        track.get('name', ''), artists[0].get('name'), artists[0].get('id'),
+        album.get('name'), album.get('id'), track.get('duration_ms')
+    )
+
+
+class LibrarySync:
+    # Local index of the user's saved tracks ("Liked Songs").
+    #
+    # The first sync reads page 0 to learn the total, then fetches all other
+    # pages concurrently (at most `concurrency` in flight) and writes compact
+    # rows to SQLite in one transaction. Later syncs walk the newest-first
+    # pages only until they reach a track already indexed with the same
+    # added_at, which is one request when nothing changed. If the totals
+    # disagree afterwards (tracks were removed) a full sync runs instead.
+    # SQLite is only touched in the executor during a sync; the lookup
+    # methods are blocking and meant to be called there as well.
+
+    PAGE_SIZE = 50
+
+    def __init__(self, api: AsyncSpotifyClient, path: Optional[Path] = None,
+                 concurrency: int = 4, min_interval: float = 30.0, retries: int = 3):
+        if path is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+            path = Path(base or Path.home() / '.local' / 'share' / 'ZZZApp') / 'library.sqlite3'
+        self.api = api
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.concurrency = concurrency
+        # Calls closer together than this reuse the last sync
+        self.min_interval = min_interval
+        self.retries = retries
+        self._inflight: Optional[asyncio.Future] = None
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        # Bumped on every write, lets derived indexes know when to rebuild
+        self.revision = 0
+        self.pages_fetched = 0
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # Sync
+
+    async def sync(self, full: bool = False) -> int:
+        """
+        Bring the index up to date, joining a sync that is already running
+
+        Args:
+            full: re-download the whole library instead of only the new tracks
+
+        Returns:
+            int: number of tracks added or updated
+        """
+        if not full and time.monotonic() - self._synced_at < self.min_interval:
+            return 0
+        return await asyncio.shield(self._start(full))
+
+    def sync_in_background(self) -> Optional[asyncio.Future]:
+        """
+        Start a sync without waiting for it, unless one is running or ran recently
+
+        Returns:
+            Future: the running or last sync, None before the first one
+        """
+        if time.monotonic() - self._synced_at >= self.min_interval:
+            self._start(False)
+        return self._inflight
+
+    def _start(self, full: bool) -> asyncio.Future:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._sync(full))
+            self._inflight.add_done_callback(self._onSyncDone)
+        return self._inflight
+
+    @staticmethod
+    def _onSyncDone(future: asyncio.Future) -> None:
+        # Background syncs have no caller to raise to
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[bold red]Error syncing saved tracks: {future.exception()}[/bold red]")
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, function, *args)
+
+    async def _sync(self, full: bool) -> int:
+        started = time.monotonic()
+        try:
+            if full or not await self._run(self._indexed):
+                added = await self._fullSync()
+            else:
+                added = await self._incrementalSync()
+        except SpotifyException as e:
+            print(f"[bold red]Error syncing saved tracks: {e}[/bold red]")
+            return 0
+        self._synced_at = time.monotonic()
+        print(f"Library sync: {added} new tracks, {await self._run(self.count)} total "
+              f"({time.monotonic() - started:.1f}s)")
+        return added
+
+    async def _incrementalSync(self) -> int:
+        known = await self._run(self._known)
+        rows, unavailable, offset, total = [], set(), 0, None
+        while True:
+            page = await self._page(offset)
+            total = page.get('total', 0)
+            reached_known = False
+            for item in page.get('items', []):
+                row = track_row(item)
+                if row is None:
+                    unavailable.add((item or {}).get('added_at') or '')
+                    continue
+                if known.get(row[0]) == row[1]:
+                    # Newest first: everything from here on is indexed already
+                    reached_known = True
+                    break
+                rows.append(row)
+            offset += self.PAGE_SIZE
+            if reached_known or not page.get('next') or offset >= total:
+                break
+
+        await self._run(self._store, rows, False, unavailable)
+        if await self._run(self._indexed) != total:
+            # Tracks were removed since the last sync, only a full pass finds which
+            return await self._fullSync()
+        return len(rows)
+
+    async def _fullSync(self) -> int:
+        first = await self._page(0)
+        total = first.get('total', 0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(offset: int) -> Dict:
+            async with semaphore:
+                return await self._page(offset)
+
+        rest = await asyncio.gather(*(limited(offset) for offset in range(self.PAGE_SIZE, total, self.PAGE_SIZE)))
+        # Pages shift if the library changes mid-sync, keep one row per track
+        rows, unavailable = {}, set()
+        for page in (first, *rest):
+            for item in page.get('items', []):
+                row = track_row(item)
+                if row is not None:
+                    rows.setdefault(row[0], row)
+                else:
+                    unavailable.add((item or {}).get('added_at') or '')
+        await self._run(self._store, rows.values(), True, unavailable)
+        return len(rows)
+
+    async def _page(self, offset: int) -> Dict:
+        for attempt in range(self.retries + 1):
+            try:
+                page = await self.api.current_user_saved_tracks(limit=self.PAGE_SIZE, offset=offset)
+                self.pages_fetched += 1
+                return page or {}
+            except SpotifyException as e:
+                if e.http_status != 429 or attempt >= self.retries:
+                    raise
+                headers = getattr(e, 'headers', None) or {}
+                try:
+                    retry_after = float(headers.get('Retry-After', 1))
+                except (TypeError, ValueError):
+                    retry_after = 1.0
+                await asyncio.sleep(retry_after)
+
+    def _store(self, rows: Iterable[tuple], replace: bool = False, unavailable: Iterable[str] = ()) -> None:
+        rows, unavailable = list(rows), list(unavailable)
+        if not rows and not unavailable and not replace:
+            return
+        try:
+            with self._lock, self._db:
+                if replace:
+                    self._db.execute('DELETE FROM saved_tracks')
+                    self._db.execute('DELETE FROM unavailable_items')
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO saved_tracks ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    rows
+                )
+                self._db.executemany('INSERT OR IGNORE INTO unavailable_items (added_at) VALUES (?)',
+                                     [(added_at,) for added_at in unavailable])
+            if rows or replace:
+                self.revision += 1
+        except sqlite3.Error as e:
+            print(f"[bold red]Error storing saved tracks: {e}[/bold red]")
+
+    # Lookups
+
+    def contains(self, track_id: str) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM saved_tracks WHERE track_id = ?',
+                                    (track_id,)).fetchone() is not None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM saved_tracks').fetchone()[0]
+
+    def _indexed(self) -> int:
+        # Saved tracks plus unavailable items, comparable to Spotify's total
+        with self._lock:
+            return self._db.execute(
+                'SELECT (SELECT COUNT(*) FROM saved_tracks) + (SELECT COUNT(*) FROM unavailable_items)'
+            ).fetchone()[0]
+
+    def _known(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._db.execute('SELECT track_id, added_at FROM saved_tracks'))
+
+    def tracks(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Indexed tracks, most recently saved first"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM saved_tracks ORDER BY added_at DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
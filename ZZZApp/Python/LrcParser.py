@@ -0,0 +1,261 @@
+import re
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+
+# [mm:ss], [mm:ss.xx], [mm:ss.xxx] and the odd [mm:ss:xx]
+_TIME = r'(\d+):(\d{1,2})(?:[.:](\d{1,3}))?'
+# Lines are scanned a chunk at a time. The usual "[mm:ss.xx]text" line,
+# also with further "[mm:ss.xx]" stamps for a repeated chorus, is matched
+# whole by the first alternative; anything else starting with "[" (metadata,
+# word timings, other timestamp formats) is captured as a whole line for
+# LINE_RE
+SCAN_RE = re.compile(
+    r'^(?:\[(\d\d):(\d\d)\.(\d\d)\]((?:\[\d\d:\d\d\.\d\d\])*)[ \t]*(?![\[ \t])([^<\r\n]*)\r?$'
+    r'|[ \t]*(\[[^\r\n]*))',
+    re.MULTILINE | re.ASCII
+)
+# A timestamped line (first timestamp, rest of the line) or a metadata tag
+LINE_RE = re.compile(r'\[(?:' + _TIME + r'\][ \t]*([^\r\n]*)|([A-Za-z#]+):([^\]\r\n]*)\])')
+LINE_TAG_RE = re.compile(r'\[' + _TIME + r'\]\s*')
+WORD_TAG_RE = re.compile(r'<' + _TIME + r'>')
+WORD_RE = re.compile(r'<' + _TIME + r'>([^<]*)')
+
+# Milliseconds per fraction digit: ".5" is 500 ms, ".05" and ".050" are 50 ms
+_FRACTION_SCALE = (0, 100, 10, 1)
+
+# Timestamp fields to milliseconds, a dict lookup is several times cheaper
+# than int(); '' is a missing field
+_MINUTES = {'': 0, **{f'{n}': n * 60000 for n in range(10)}, **{f'{n:02d}': n * 60000 for n in range(100)}}
+_SECONDS = {'': 0, **{f'{n}': n * 1000 for n in range(10)}, **{f'{n:02d}': n * 1000 for n in range(100)}}
+_FRACTIONS = {
+    '': 0,
+    **{f'{n:0{digits}d}': n * _FRACTION_SCALE[digits] for digits in (1, 2, 3) for n in range(10 ** digits)}
+}
+
+
+def _ms(minutes: str, seconds: str, fraction: Optional[str]) -> int:
+    try:
+        return _MINUTES[minutes] + _SECONDS[seconds] + _FRACTIONS[fraction or '']
+    except KeyError:
+        # Past 99 minutes, or digits other than 0-9
+        ms = int(minutes) * 60000 + int(seconds) * 1000
+        if fraction:
+            ms += int(fraction) * _FRACTION_SCALE[len(fraction)]
+        return ms
+
+
+def _shifted(times: array, shift: int) -> array:
+    # Shift times, clamping the ones that would start before 0
+    shifted = array('i', [t + shift for t in times])
+    if shifted and min(shifted) < 0:
+        shifted = array('i', [t if t > 0 else 0 for t in shifted])
+    return shifted
+
+
+def _words(body: str) -> tuple:
+    # Enhanced LRC: "<mm:ss.xx>word <mm:ss.xx>word ..."
+    head = body.split('<', 1)[0]
+    tags = [row for row in WORD_RE.findall(body) if row[3].strip()]
+    if not tags:
+        return WORD_TAG_RE.sub('', body).strip(), None
+    minute_ms, second_ms, fraction_ms = _MINUTES, _SECONDS, _FRACTIONS
+    try:
+        times = array('i', [minute_ms[m] + second_ms[s] + fraction_ms[f] for m, s, f, _ in tags])
+    except KeyError:
+        times = array('i', [_ms(m, s, f) for m, s, f, _ in tags])
+    words = [row[3] for row in tags]
+    return (head + ''.join(words)).strip(), (times, words)
+
+
+class ParsedLrc:
+    # Result of parse_lrc: parallel compact arrays, sorted by start time.
+    #
+    # times[i] / lines[i] are one lyric line. Enhanced LRC word timings are
+    # flattened: the words of line i are word_times/words[word_starts[i]:
+    # word_starts[i + 1]], an empty slice for lines without word timing.
+
+    __slots__ = ('times', 'lines', 'word_starts', 'word_times', 'words', 'metadata')
+
+    def __init__(self):
+        self.times = array('i')
+        self.lines: List[str] = []
+        self.word_starts = array('i', [0])
+        self.word_times = array('i')
+        self.words: List[str] = []
+        self.metadata: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def has_word_timing(self) -> bool:
+        return len(self.word_times) > 0
+
+    def line_words(self, index: int) -> tuple:
+        """(start times, words) of one line, both empty without word timing"""
+        start, end = self.word_starts[index], self.word_starts[index + 1]
+        return self.word_times[start:end], self.words[start:end]
+
+    def to_synced(self) -> List[Dict]:
+        """The [{'time': ms, 'words': str}, ...] format used across the app"""
+        return [{'time': t, 'words': line} for t, line in zip(self.times, self.lines)]
+
+
+def _chunks(lines: Iterable[str], size: int = 256) -> Iterator[str]:
+    # An iterable of lines as texts of up to `size` lines, read as needed
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield '\n'.join(line.rstrip('\r\n') for line in chunk)
+
+
+def _line(line: str, metadata: Dict[str, str]) -> List[tuple]:
+    # Everything SCAN_RE leaves for the slow path, as (start, text, timing)
+    # entries: none for metadata, one per timestamp otherwise
+    row = LINE_RE.match(line)
+    if row is None:
+        return []
+    minutes, seconds, fraction, body, tag, value = row.groups()
+    if minutes is None:
+        metadata[tag.lower()] = value.strip()
+        return []
+    start = _ms(minutes, seconds, fraction)
+    body = body.strip()
+    starts = [start]
+    while body[:1] == '[':
+        stamp = LINE_TAG_RE.match(body)
+        if stamp is None:
+            break
+        starts.append(_ms(*stamp.groups()))
+        body = body[stamp.end():]
+    timing = None
+    if '<' in body:
+        body, timing = _words(body)
+    # Word times are written for the first timestamp, repeats shift them
+    return [(repeat, body, timing and timing + (repeat - start,)) for repeat in starts]
+
+
+def parse_lrc(source: Union[str, Iterable[str]]) -> ParsedLrc:
+    """
+    Parse LRC lyrics
+
+    Handles several timestamps on one line ([00:10.00][01:20.00]chorus),
+    metadata tags ([ar:], [ti:], [length:], ...), [offset:+/-ms] and
+    enhanced LRC word timings (<mm:ss.xx>word). Lines without a timestamp
+    are ignored. Plain "[mm:ss.xx]text" lines are converted in bulk; only
+    the others are looked at one by one.
+
+    Args:
+        source: the whole LRC text, or any iterable of lines (e.g. an open
+            file), read a few hundred lines at a time
+
+    Returns:
+        ParsedLrc: lines and word timings sorted by start time, offset applied
+    """
+    times = array('i')
+    texts: List[str] = []
+    metadata: Dict[str, str] = {}
+    # Per line: None, or (word times, words, shift) for enhanced lines;
+    # only allocated once the first enhanced line shows up
+    timings = None
+    # Second and later timestamps of a line, kept apart until the end
+    extra_starts, extra_bodies, extra_timings = [], [], []
+
+    minute_ms, second_ms, fraction_ms = _MINUTES, _SECONDS, _FRACTIONS
+    for text in ((source,) if isinstance(source, str) else _chunks(source)):
+        rows = SCAN_RE.findall(text)
+        starts = [
+            minute_ms[minutes] + second_ms[seconds] + fraction_ms[hundredths]
+            for minutes, seconds, hundredths, _, _, _ in rows
+        ]
+        bodies = [row[4].rstrip() for row in rows]
+        chunk_timings = None
+        dropped = []
+        for index in [index for index, row in enumerate(rows) if row[3] or row[5]]:
+            repeats = rows[index][3]
+            if repeats:
+                # "[mm:ss.xx]" each, in the same positions as the first one
+                for i in range(0, len(repeats), 10):
+                    extra_starts.append(minute_ms[repeats[i + 1:i + 3]] + second_ms[repeats[i + 4:i + 6]]
+                                        + fraction_ms[repeats[i + 7:i + 9]])
+                    extra_bodies.append(bodies[index])
+                    extra_timings.append(None)
+                continue
+            entries = _line(rows[index][5], metadata)
+            if not entries:
+                dropped.append(index)
+                continue
+            starts[index], bodies[index], timing = entries[0]
+            if timing is not None:
+                if chunk_timings is None:
+                    chunk_timings = [None] * len(rows)
+                chunk_timings[index] = timing
+            for start, body, timing in entries[1:]:
+                extra_starts.append(start)
+                extra_bodies.append(body)
+                extra_timings.append(timing)
+        for index in reversed(dropped):
+            del starts[index], bodies[index]
+            if chunk_timings is not None:
+                del chunk_timings[index]
+
+        if timings is None and chunk_timings is not None:
+            timings = [None] * len(times)
+        times.extend(starts)
+        texts.extend(bodies)
+        if timings is not None:
+            timings.extend(chunk_timings or [None] * len(starts))
+
+    offset = 0
+    if 'offset' in metadata:
+        try:
+            offset = int(metadata['offset'])
+        except ValueError:
+            pass
+
+    if timings is None and any(extra_timings):
+        timings = [None] * len(times)
+    if times.tolist() == sorted(times):
+        # The usual case: repeats slot in after the lines with the same time
+        for start, body, timing in zip(extra_starts, extra_bodies, extra_timings):
+            index = bisect_right(times, start)
+            times.insert(index, start)
+            texts.insert(index, body)
+            if timings is not None:
+                timings.insert(index, timing)
+        order = range(len(times))
+    else:
+        times.extend(extra_starts)
+        texts.extend(extra_bodies)
+        if timings is not None:
+            timings.extend(extra_timings)
+        # sorted() is stable, so equal times keep file order
+        order = sorted(range(len(times)), key=times.__getitem__)
+        times = array('i', [times[i] for i in order])
+        texts = [texts[i] for i in order]
+
+    parsed = ParsedLrc()
+    parsed.metadata = metadata
+    if offset:
+        times = _shifted(times, -offset)
+    parsed.times, parsed.lines = times, texts
+
+    if timings is None:
+        parsed.word_starts = array('i', bytes(4 * (len(times) + 1)))
+        return parsed
+    word_starts, word_times = parsed.word_starts, parsed.word_times
+    for i in order:
+        timing = timings[i]
+        if timing is not None:
+            line_times, words, shift = timing
+            word_times.extend(_shifted(line_times, shift) if shift else line_times)
+            parsed.words.extend(words)
+        word_starts.append(len(word_times))
+    if offset:
+        parsed.word_times = _shifted(word_times, -offset)
+    return parsed
@@ -0,0 +1,92 @@
+from difflib import SequenceMatcher
+from typing import Dict, Optional
+
+from LrcParser import parse_lrc
+from LyricsStore import DURATION_TOLERANCE_MS, normalize
+from LyricsTimeline import LyricsTimeline
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+def _similarity(first: str, second: str) -> float:
+    return SequenceMatcher(None, normalize(first), normalize(second)).ratio()
+
+
+class LRCLibProvider:
+    # Lyrics from lrclib.net over the shared aiohttp pool.
+    #
+    # Replaces the blocking lrcup client, so a lookup never stalls the event
+    # loop and can be raced against other providers and cancelled. The exact
+    # signature endpoint (/get: track, artist, album, duration) is tried
+    # first; only when it has nothing does a fuzzy /search run, and its
+    # results are scored on title/artist similarity and duration instead of
+    # trusting the first hit. Repeat lookups are answered by the lyrics
+    # store before they reach the provider.
+
+    name = 'LRCLib'
+    BASE_URL = 'https://lrclib.net/api/'
+    HEADERS = {'User-Agent': 'ZZZApp (https://github.com/Hypxria/ZZZWeb)'}
+    # Below this score a search result is more likely another song than ours
+    MIN_SCORE = 0.6
+
+    def __init__(self, api: AsyncSpotifyClient):
+        self.api = api
+
+    async def __call__(self, track_info: Dict) -> Optional[Dict]:
+        record = await self._exact(track_info) or await self._search(track_info)
+        if record is None:
+            return None
+        return self._toLyrics(record, track_info)
+
+    async def _get(self, endpoint: str, params: Optional[Dict] = None):
+        return await self.api.get_json(self.BASE_URL + endpoint, params=params, headers=self.HEADERS)
+
+    async def _exact(self, track_info: Dict) -> Optional[Dict]:
+        if not track_info.get('album') or not track_info.get('duration'):
+            return None
+        # LRCLib matches the duration to within two seconds
+        return await self._get('get', {
+            'track_name': track_info['name'],
+            'artist_name': track_info['artist'],
+            'album_name': track_info['album'],
+            'duration': round(track_info['duration'] / 1000)
+        })
+
+    async def _search(self, track_info: Dict) -> Optional[Dict]:
+        results = await self._get('search', {
+            'track_name': track_info['name'], 'artist_name': track_info['artist']
+        })
+        best, best_score = None, self.MIN_SCORE
+        for record in results or ():
+            score = self.score(record, track_info)
+            if score > best_score:
+                best, best_score = record, score
+        return best
+
+    @staticmethod
+    def score(record: Dict, track_info: Dict) -> float:
+        """0..1 match quality of a search result; synced lyrics win ties"""
+        title = _similarity(record.get('trackName', ''), track_info['name'])
+        artist = _similarity(record.get('artistName', ''), track_info['artist'])
+        duration = track_info.get('duration')
+        if duration and record.get('duration'):
+            delta = abs(record['duration'] * 1000 - duration)
+            if delta > 4 * DURATION_TOLERANCE_MS:
+                return 0.0
+            timing = 1 - delta / (4 * DURATION_TOLERANCE_MS)
+        else:
+            timing = 0.5
+        synced = 0.05 if record.get('syncedLyrics') else 0.0
+        return 0.45 * title + 0.25 * artist + 0.25 * timing + synced
+
+    def _toLyrics(self, record: Dict, track_info: Dict) -> Optional[Dict]:
+        parsed = parse_lrc(record.get('syncedLyrics') or '')
+        plain = record.get('plainLyrics')
+        if not parsed and not plain:
+            return None
+        return {
+            'synced': parsed.to_synced() or None,
+            'plain': plain or '\n'.join(parsed.lines),
+            'timeline': LyricsTimeline.from_parsed(parsed),
+            'provider': self.name,
+            'track_info': track_info
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from rich import print
+
+from LyricsStore import LyricsStore
+
+
+class LyricsResolver:
+    # Finds lyrics for a track: the local store first, then every remote
+    # provider at once.
+    #
+    # Providers race, each under its own timeout. The first synced result
+    # wins and cancels the rest; a plain-only result is held back until the
+    # others have had their chance to do better. Results, including "no
+    # lyrics" when every provider answered, go to the store. Per-provider
+    # latency and hit rate are kept in `stats`.
+
+    def __init__(self, store: LyricsStore, timeout: float = 5.0):
+        self.store = store
+        self.timeout = timeout
+        self._providers: Dict[str, tuple] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def add_provider(self, name: str, fetch: Callable[[Dict], Awaitable[Optional[Dict]]],
+                     timeout: Optional[float] = None) -> None:
+        """
+        Register a provider
+
+        Args:
+            name: provider name, used in stats
+            fetch: coroutine function taking track_info, returning a lyrics dict or None
+            timeout: seconds before the provider is given up on, defaults to the resolver's
+        """
+        self._providers[name] = (fetch, timeout or self.timeout)
+        self.stats[name] = {'calls': 0, 'hits': 0, 'synced': 0, 'timeouts': 0, 'errors': 0, 'latency': 0.0}
+
+    async def resolve(self, track_id: Optional[str], track_info: Dict) -> Optional[Dict]:
+        """
+        Lyrics for a track, from the store or the fastest good provider
+
+        Args:
+            track_id: Spotify track ID, the store's primary key
+            track_info: {'name', 'artist', 'duration'} of the track
+
+        Returns:
+            dict: lyrics in the {'synced', 'plain', 'provider', ...} format, or None
+        """
+        # The store blocks on SQLite, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        known, lyrics = await loop.run_in_executor(
+            None, self.store.get, track_id, track_info['artist'], track_info['name'], track_info.get('duration')
+        )
+        if known:
+            return lyrics
+
+        lyrics, conclusive = await self._race(track_info)
+        # A timeout or error is not a "no lyrics" answer, don't cache it as one
+        if lyrics or conclusive:
+            await loop.run_in_executor(
+                None, self.store.put, track_id, track_info['artist'], track_info['name'],
+                track_info.get('duration'), lyrics
+            )
+        return lyrics
+
+    async def _race(self, track_info: Dict) -> tuple:
+        tasks = {
+            asyncio.ensure_future(self._call(name, fetch, timeout, track_info)): name
+            for name, (fetch, timeout) in self._providers.items()
+        }
+        plain, conclusive = None, True
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ok, lyrics = task.result()
+                    conclusive = conclusive and ok
+                    if lyrics and lyrics.get('synced'):
+                        return lyrics, True
+                    if lyrics and plain is None:
+                        plain = lyrics
+            return plain, conclusive
+        finally:
+            # Losers, or everything if the caller was cancelled
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call(self, name: str, fetch: Callable, timeout: float, track_info: Dict) -> tuple:
+        # (answered, lyrics): answered is False on timeouts and errors
+        stats = self.stats[name]
+        stats['calls'] += 1
+        started = time.monotonic()
+        try:
+            lyrics = await asyncio.wait_for(fetch(track_info), timeout)
+        except asyncio.TimeoutError:
+            stats['timeouts'] += 1
+            print(f"[bold yellow]{name} lyrics lookup timed out[/bold yellow]")
+            return False, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"[bold red]{name} lyrics lookup failed: {e}[/bold red]")
+            return False, None
+        finally:
+            stats['latency'] += time.monotonic() - started
+
+        if lyrics:
+            stats['hits'] += 1
+            if lyrics.get('synced'):
+                stats['synced'] += 1
+        return True, lyrics
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Hit rate and mean latency (seconds) per provider"""
+        return {
+            name: {
+                'hit_rate': stats['hits'] / stats['calls'] if stats['calls'] else 0.0,
+                'mean_latency': stats['latency'] / stats['calls'] if stats['calls'] else 0.0,
+                **stats
+            }
+            for name, stats in self.stats.items()
+        }
@@ -0,0 +1,318 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import QStandardPaths
+from rich import print
+
+from LyricsTimeline import LyricsTimeline
+
+
+# Durations of one recording on different releases differ by a second or two
+DURATION_TOLERANCE_MS = 3000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lyrics (
+    id INTEGER PRIMARY KEY,
+    track_id TEXT UNIQUE,
+    fingerprint TEXT NOT NULL,
+    duration_ms INTEGER,
+    found INTEGER NOT NULL,
+    times BLOB,
+    lines TEXT,
+    word_starts BLOB,
+    word_times BLOB,
+    words TEXT,
+    plain TEXT,
+    provider TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lyrics_fingerprint ON lyrics (fingerprint);
+"""
+SCHEMA_VERSION = 3
+# Columns added since version 1, for ALTER TABLE on older databases
+WORD_COLUMNS = (('word_starts', 'BLOB'), ('word_times', 'BLOB'), ('words', 'TEXT'))
+# One row per song and duration among the rows without a track ID, so
+# saving them again replaces instead of adding (version 3)
+UNTRACKED_KEY = 'fingerprint, IFNULL(duration_ms, -1)'
+UNTRACKED_INDEX = f"""
+CREATE UNIQUE INDEX IF NOT EXISTS lyrics_untracked ON lyrics ({UNTRACKED_KEY})
+WHERE track_id IS NULL
+"""
+# What _decode() reads, in order
+COLUMNS = 'found, times, lines, word_starts, word_times, words, plain, provider, fetched_at'
+
+
+def normalize(text: str) -> str:
+    # Case, accents, punctuation and "(feat. ...)" / "- Remastered" suffixes
+    # differ between providers for the same song
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    text = re.sub(r'\s*[\(\[].*?[\)\]]', '', text)
+    text = re.sub(r'\s+-\s+.*$', '', text)
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def fingerprint(artist: str, title: str) -> str:
+    return f"{normalize(artist)}|{normalize(title)}"
+
+
+class LyricsStore:
+    # Persistent lyrics database keyed by Spotify track ID.
+    #
+    # Rows also carry a normalized artist/title fingerprint plus the duration,
+    # so lyrics imported without a track ID (or found for another release of
+    # the same song) still match. Timelines are stored ready to use, the
+    # start times (and word timings, for enhanced LRC) as packed int32 blobs,
+    # and "no lyrics" answers are cached
+    # too but expire after `negative_ttl` seconds. Only the last
+    # `memory_entries` lookups are kept decoded in memory. Calls block on
+    # SQLite and are serialized by a lock, so async callers run them in an
+    # executor.
+
+    def __init__(self, path: Optional[Path] = None, memory_entries: int = 64,
+                 negative_ttl: float = 24 * 60 * 60, migrate_from: Optional[Path] = None):
+        if path is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+            path = Path(base or Path.home() / '.local' / 'share' / 'ZZZApp') / 'lyrics.sqlite3'
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Optional[Dict]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._migrate(migrate_from)
+
+    def _migrate(self, migrate_from: Optional[Path]) -> None:
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        if version == 1:
+            # Version 1 tables predate word timings
+            existing = {row[1] for row in self._db.execute('PRAGMA table_info(lyrics)')}
+            for name, kind in WORD_COLUMNS:
+                if name not in existing:
+                    self._db.execute(f'ALTER TABLE lyrics ADD COLUMN {name} {kind}')
+        if version > 0:
+            # Up to version 2 every save without a track ID added a row, keep the newest
+            self._db.execute(
+                'DELETE FROM lyrics WHERE track_id IS NULL AND id NOT IN ('
+                f'SELECT MAX(id) FROM lyrics WHERE track_id IS NULL GROUP BY {UNTRACKED_KEY})'
+            )
+        self._db.execute(UNTRACKED_INDEX)
+        if version == 0 and migrate_from is not None:
+            # Fresh database: the legacy per-song files were never imported
+            self.migrate_json(migrate_from)
+        self._db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # Lookups
+
+    def get(self, track_id: Optional[str], artist: str, title: str,
+            duration_ms: Optional[int] = None) -> Tuple[bool, Optional[Dict]]:
+        """
+        Look up lyrics for a track
+
+        Returns:
+            tuple: (known, lyrics). `known` is False when the providers have to
+                be asked; lyrics is None for a cached "no lyrics" answer.
+        """
+        key = fingerprint(artist, title)
+        memory_key = track_id or key
+        with self._lock:
+            if memory_key in self._memory:
+                self._memory.move_to_end(memory_key)
+                self.hits += 1
+                return True, self._memory[memory_key]
+
+            row = None
+            if track_id:
+                row = self._db.execute(
+                    f'SELECT {COLUMNS} FROM lyrics WHERE track_id = ?',
+                    (track_id,)
+                ).fetchone()
+            if row is None:
+                row = self._byFingerprint(key, duration_ms)
+
+            if row is None or (not row[0] and time.time() - row[-1] > self.negative_ttl):
+                self.misses += 1
+                return False, None
+
+            lyrics = self._decode(row, artist, title, duration_ms)
+            # Negative answers stay on disk only, where their TTL is checked
+            if lyrics is not None:
+                self._remember(memory_key, lyrics)
+            self.hits += 1
+            return True, lyrics
+
+    def _byFingerprint(self, key: str, duration_ms: Optional[int]):
+        # Only positive rows: a miss for one release says nothing about another
+        rows = self._db.execute(
+            f'SELECT {COLUMNS}, duration_ms FROM lyrics '
+            'WHERE fingerprint = ? AND found = 1 ORDER BY fetched_at DESC',
+            (key,)
+        ).fetchall()
+        best, best_delta = None, None
+        for row in rows:
+            stored = row[-1]
+            if duration_ms is None or stored is None:
+                delta = DURATION_TOLERANCE_MS
+            else:
+                delta = abs(stored - duration_ms)
+                if delta > DURATION_TOLERANCE_MS:
+                    continue
+            if best is None or delta < best_delta:
+                best, best_delta = row, delta
+        return best[:-1] if best else None
+
+    @staticmethod
+    def _decode(row, artist: str, title: str, duration_ms: Optional[int]) -> Optional[Dict]:
+        found, times, lines, word_starts, word_times, words, plain, provider, fetched_at = row
+        if not found:
+            return None
+        timeline = LyricsTimeline(
+            array('i', times or b''), json.loads(lines) if lines else (),
+            array('i', word_starts or b''), array('i', word_times or b''), json.loads(words) if words else ()
+        )
+        return {
+            'synced': [{'time': t, 'words': w} for t, w in zip(timeline.times, timeline.lines)] or None,
+            'plain': plain,
+            'timeline': timeline,
+            'provider': provider,
+            'fetched_at': fetched_at,
+            'track_info': {'name': title, 'artist': artist, 'duration': duration_ms}
+        }
+
+    def _remember(self, key: str, lyrics: Optional[Dict]) -> None:
+        self._memory[key] = lyrics
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # Writes
+
+    def put(self, track_id: Optional[str], artist: str, title: str, duration_ms: Optional[int],
+            lyrics: Optional[Dict]) -> None:
+        """Store lyrics, or a "no lyrics" answer when `lyrics` is None"""
+        key = fingerprint(artist, title)
+        found = bool(lyrics and (lyrics.get('synced') or lyrics.get('plain')))
+        if not found and not track_id:
+            # Misses are only ever looked up by track ID
+            return
+        columns = (None,) * 5
+        plain = provider = None
+        if found:
+            timeline = lyrics.get('timeline') or LyricsTimeline.from_synced(lyrics.get('synced'))
+            columns = self._pack(timeline)
+            plain = lyrics.get('plain')
+            provider = lyrics.get('provider')
+
+        with self._lock:
+            try:
+                self._write(track_id, key, duration_ms, found, columns, plain, provider)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[bold red]Error storing lyrics for {artist} - {title}: {e}[/bold red]")
+                return
+            self._memory.pop(track_id or key, None)
+            if found:
+                self._remember(track_id or key,
+                               self._decode((found,) + columns + (plain, provider, time.time()),
+                                            artist, title, duration_ms))
+
+    @staticmethod
+    def _pack(timeline: LyricsTimeline) -> tuple:
+        # (times, lines, word_starts, word_times, words) column values
+        lines = json.dumps(timeline.lines, ensure_ascii=False)
+        if not timeline.has_words:
+            return timeline.times.tobytes(), lines, None, None, None
+        return (timeline.times.tobytes(), lines, timeline.word_starts.tobytes(),
+                timeline.word_times.tobytes(), json.dumps(timeline.words, ensure_ascii=False))
+
+    def _write(self, track_id, key, duration_ms, found, columns, plain, provider) -> None:
+        values = (key, duration_ms, int(found)) + tuple(columns) + (plain, provider, time.time())
+        if track_id:
+            self._db.execute(
+                'INSERT INTO lyrics (fingerprint, duration_ms, found, times, lines, word_starts, '
+                'word_times, words, plain, provider, fetched_at, track_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (track_id) DO UPDATE SET fingerprint = excluded.fingerprint, '
+                'duration_ms = excluded.duration_ms, found = excluded.found, times = excluded.times, '
+                'lines = excluded.lines, word_starts = excluded.word_starts, '
+                'word_times = excluded.word_times, words = excluded.words, plain = excluded.plain, '
+                'provider = excluded.provider, fetched_at = excluded.fetched_at',
+                values + (track_id,)
+            )
+        else:
+            self._db.execute(
+                'INSERT INTO lyrics (fingerprint, duration_ms, found, times, lines, word_starts, '
+                'word_times, words, plain, provider, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                f'ON CONFLICT ({UNTRACKED_KEY}) WHERE track_id IS NULL DO UPDATE SET '
+                'found = excluded.found, times = excluded.times, lines = excluded.lines, '
+                'word_starts = excluded.word_starts, word_times = excluded.word_times, '
+                'words = excluded.words, plain = excluded.plain, provider = excluded.provider, '
+                'fetched_at = excluded.fetched_at',
+                values
+            )
+
+    # Migration
+
+    def migrate_json(self, directory: Path) -> int:
+        """
+        Import the legacy per-song files from `directory`
+
+        `<artist> - <title>.json` files hold the lyrics dict saved by earlier
+        versions, `.txt` files plain lyrics. They have no track ID, so they
+        are matched by fingerprint.
+
+        Returns:
+            int: number of imported files
+        """
+        directory = Path(directory)
+        if not directory.is_dir():
+            return 0
+
+        imported = 0
+        for path in sorted(directory.iterdir()):
+            if path.suffix not in ('.json', '.txt') or ' - ' not in path.stem:
+                continue
+            artist, title = path.stem.split(' - ', 1)
+            duration_ms = None
+            try:
+                if path.suffix == '.json':
+                    data = json.loads(path.read_text(encoding='utf-8'))
+                    info = data.get('track_info') or {}
+                    artist, title = info.get('artist', artist), info.get('name', title)
+                    duration_ms = info.get('duration')
+                    synced, plain = data.get('synced'), data.get('plain')
+                    provider = data.get('provider') or 'Local'
+                else:
+                    synced, plain, provider = None, path.read_text(encoding='utf-8'), 'Local'
+                if not synced and not plain:
+                    continue
+
+                self._write(None, fingerprint(artist, title), duration_ms, True,
+                            self._pack(LyricsTimeline.from_synced(synced)), plain, provider)
+                imported += 1
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"[bold red]Skipping lyrics file {path.name}: {e}[/bold red]")
+
+        self._db.commit()
+        if imported:
+            print(f"Imported {imported} lyrics files from {directory}")
+        return imported
@@ -0,0 +1,144 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+class LyricsTimeline:
+    # Synced lyrics stored as a sorted array of start times (ms) plus a
+    # parallel tuple of lines.
+    #
+    # index_at() keeps the last answer as a hint: while playing, the position
+    # almost always lands on the same line or the one after it, which is
+    # checked in O(1) before falling back to a binary search (seeks, rewinds).
+    #
+    # Enhanced LRC word timings are optional and kept flat, as in ParsedLrc:
+    # the words of line i are word_times/words[word_starts[i]:word_starts[i+1]],
+    # so the word being sung is a second bisect inside the current line.
+
+    __slots__ = ('times', 'lines', 'word_starts', 'word_times', 'words', '_hint')
+
+    def __init__(self, times: Iterable[int] = (), lines: Iterable[str] = (),
+                 word_starts: Iterable[int] = (), word_times: Iterable[int] = (),
+                 words: Iterable[str] = ()):
+        self.times = array('i', times)
+        self.lines = tuple(lines)
+        self.word_starts = array('i', word_starts)
+        self.word_times = array('i', word_times)
+        self.words = tuple(words)
+        self._hint = -1
+        if len(self.times) != len(self.lines):
+            raise ValueError("times and lines must have the same length")
+        if self.word_times and len(self.word_starts) != len(self.times) + 1:
+            raise ValueError("word_starts needs one entry per line plus one")
+
+    @classmethod
+    def from_parsed(cls, parsed) -> 'LyricsTimeline':
+        """Build a timeline, word timings included, from LrcParser.parse_lrc output"""
+        if not parsed.has_word_timing:
+            return cls(parsed.times, parsed.lines)
+        return cls(parsed.times, parsed.lines, parsed.word_starts, parsed.word_times, parsed.words)
+
+    @classmethod
+    def from_synced(cls, synced: Optional[List[Dict]]) -> 'LyricsTimeline':
+        """Build a timeline from the [{'time': ms, 'words': str}, ...] lyrics format"""
+        if not synced:
+            return cls()
+        ordered = sorted(synced, key=lambda lyric: lyric['time'])
+        return cls(
+            (int(lyric['time']) for lyric in ordered),
+            (lyric['words'] for lyric in ordered)
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __bool__(self) -> bool:
+        return len(self.times) > 0
+
+    def index_at(self, position_ms: int) -> int:
+        """
+        Index of the line being sung at `position_ms`
+
+        Returns:
+            int: line index, or -1 if the position is before the first line
+        """
+        times = self.times
+        count = len(times)
+        hint = self._hint
+
+        # Fast path: same line as last time, or the one right after it
+        if 0 <= hint < count and times[hint] <= position_ms:
+            if hint + 1 == count or position_ms < times[hint + 1]:
+                return hint
+            if hint + 2 == count or position_ms < times[hint + 2]:
+                self._hint = hint + 1
+                return hint + 1
+        elif hint == -1 and (count == 0 or position_ms < times[0]):
+            return -1
+
+        self._hint = bisect_right(times, position_ms) - 1
+        return self._hint
+
+    def line(self, index: int) -> str:
+        """Line text at `index`, or an empty string when out of range"""
+        if 0 <= index < len(self.lines):
+            return self.lines[index]
+        return ""
+
+    def next_time(self, index: int) -> Optional[int]:
+        """Start time of the line after `index`, None after the last line"""
+        if index + 1 < len(self.times):
+            return self.times[index + 1]
+        return None
+
+    # Word timing
+
+    @property
+    def has_words(self) -> bool:
+        return len(self.word_times) > 0
+
+    def line_words(self, index: int) -> tuple:
+        """Timed words of line `index`, empty without word timing"""
+        if not self.word_times or not 0 <= index < len(self.times):
+            return ()
+        return self.words[self.word_starts[index]:self.word_starts[index + 1]]
+
+    def word_index_at(self, index: int, position_ms: int) -> int:
+        """
+        Index, within line `index`, of the word being sung at `position_ms`
+
+        Returns:
+            int: word index, or -1 before the first word or without word timing
+        """
+        if not self.word_times or not 0 <= index < len(self.times):
+            return -1
+        start, end = self.word_starts[index], self.word_starts[index + 1]
+        return bisect_right(self.word_times, position_ms, start, end) - 1 - start
+
+    def line_progress(self, index: int, position_ms: int, end_ms: Optional[int] = None) -> float:
+        """
+        How much of line `index` has been sung, 0 to 1
+
+        With word timing the words count equally and the current one fills
+        up over its own duration; without it the line fills up linearly
+        until the next line starts (or `end_ms` for the last line).
+        """
+        if not 0 <= index < len(self.times):
+            return 0.0
+        line_end = self.next_time(index) or end_ms
+        start, end = (self.word_starts[index], self.word_starts[index + 1]) if self.word_times else (0, 0)
+        if start == end:
+            line_start = self.times[index]
+            if not line_end or line_end <= line_start:
+                return 1.0 if position_ms >= line_start else 0.0
+            return min(1.0, max(0.0, (position_ms - line_start) / (line_end - line_start)))
+
+        word = bisect_right(self.word_times, position_ms, start, end) - 1
+        if word < start:
+            return 0.0
+        word_start = self.word_times[word]
+        word_end = self.word_times[word + 1] if word + 1 < end else line_end
+        fraction = 1.0
+        if word_end and word_end > word_start:
+            fraction = min(1.0, (position_ms - word_start) / (word_end - word_start))
+        return (word - start + fraction) / (end - start)
@@ -0,0 +1,491 @@
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Union
+
+from rich import print
+
+from PlaybackStore import PlaybackStore, select_is_playing, select_timing, select_track_id
+
+try:
+    from dbus_next.aio import MessageBus
+except ImportError:  # MPRIS is optional, Linux only
+    MessageBus = None
+
+
+TRACK_CHANGED = 'track_changed'
+PLAY_STATE_CHANGED = 'play_state_changed'
+SEEKED = 'seeked'
+
+
+def make_event(event_type: str, track_id: Optional[str], is_playing: bool,
+               position_ms: Optional[int], source: str,
+               playback: Optional[dict] = None) -> dict:
+    # Normalized playback event, identical whatever backend produced it.
+    # `playback` carries the full snapshot when the backend has one.
+    return {
+        'type': event_type,
+        'track_id': track_id,
+        'is_playing': is_playing,
+        'position_ms': position_ms,
+        'source': source,
+        'playback': playback,
+    }
+
+
+def diff_playback(previous: Optional[dict], current: Optional[dict], source: str,
+                  seek_threshold_ms: Optional[float] = None, drift_ms: float = 0.0) -> List[dict]:
+    # Turns two consecutive snapshots into the normalized events between them.
+    # A seek can't be seen from snapshots alone; pass the playback clock drift
+    # and the threshold above which it stops being jitter.
+    track_id = select_track_id(current)
+    is_playing = select_is_playing(current)
+    position = current.get('progress_ms') if current else None
+
+    events = []
+    if track_id != select_track_id(previous):
+        events.append(make_event(TRACK_CHANGED, track_id, is_playing, position, source, current))
+    else:
+        if is_playing != select_is_playing(previous):
+            events.append(make_event(PLAY_STATE_CHANGED, track_id, is_playing, position, source, current))
+        if seek_threshold_ms is not None and abs(drift_ms) > seek_threshold_ms:
+            events.append(make_event(SEEKED, track_id, is_playing, position, source, current))
+    return events
+
+
+def parse_records(line: Union[str, bytes], source: str) -> List[Any]:
+    # One JSON line from a bridge or a recording, as zero or one records.
+    # Blank and malformed lines give none; `null` is a valid record, the
+    # snapshot of a player with nothing loaded.
+    if not line.strip():
+        return []
+    try:
+        return [json.loads(line)]
+    except ValueError as e:
+        print(f"[bold yellow]Ignoring malformed {source} record: {e}[/bold yellow]")
+        return []
+
+
+class PlaybackEventSource(ABC):
+    # Base class for the backends feeding SpotifyEventListener.
+    #
+    # A source emits normalized events (see make_event) to every connected
+    # callback. Sources other than HTTP polling also keep the shared
+    # PlaybackStore in sync, so consumers reading the store never have to
+    # know where the state came from. run() is the source's lifetime: start()
+    # runs it as a task and stop() cancels it.
+
+    name = 'base'
+    # A track change without metadata is looked up through the Web API,
+    # which can trail the local player by a moment
+    TRACK_REFRESH_ATTEMPTS = 3
+    TRACK_REFRESH_DELAY = 0.5
+
+    def __init__(self, store: PlaybackStore):
+        self.store = store
+        self._callbacks: List[Callable] = []
+        self._task: Optional[asyncio.Task] = None
+        self._previous = store.snapshot
+
+    def connect(self, callback: Callable) -> None:
+        """Register a callback (sync or coroutine function) for events"""
+        self._callbacks.append(callback)
+
+    async def start(self) -> bool:
+        """Start producing events, returns False if the backend is unavailable"""
+        self._task = asyncio.create_task(self.run())
+        return True
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @abstractmethod
+    async def run(self) -> None:
+        """Produce events until cancelled"""
+
+    async def _emit(self, event: dict) -> None:
+        for callback in list(self._callbacks):
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[bold red]Error handling {event['type']} from {self.name}: {e}[/bold red]")
+
+    async def _apply(self, event: dict) -> bool:
+        # Bring the store up to date with an event from a non-HTTP backend.
+        # False when the store could not catch up and the event must not be
+        # emitted with someone else's snapshot
+        if event.get('playback') is not None:
+            self.store.push(event['playback'])
+        elif event['type'] == TRACK_CHANGED:
+            # No metadata in the event, one request per track instead of polling
+            if not await self._refreshTrack(event['track_id']):
+                print(f"[bold yellow]Web API does not report track {event['track_id']} yet, "
+                      f"skipping the {self.name} track change[/bold yellow]")
+                return False
+        else:
+            fields = {'is_playing': event['is_playing']}
+            if event.get('position_ms') is not None:
+                fields['progress_ms'] = event['position_ms']
+            self.store.patch(**fields)
+        if event.get('playback') is None and self.store.snapshot is not None:
+            event['playback'] = self.store.snapshot
+        return True
+
+    async def _refreshTrack(self, track_id: Optional[str]) -> bool:
+        for attempt in range(self.TRACK_REFRESH_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(self.TRACK_REFRESH_DELAY)
+            if self.store.retry_after > 0:
+                # Rate limited, a refresh would only return the stale snapshot
+                return False
+            if select_track_id(await self.store.refresh()) == track_id:
+                return True
+        return False
+
+    async def _handleRecord(self, record: Optional[dict]) -> None:
+        # A record from parse_records: either a normalized event or a raw
+        # current_playback() snapshot
+        is_event = isinstance(record, dict) and 'type' in record
+        if is_event:
+            events = [make_event(
+                record['type'], record.get('track_id'), bool(record.get('is_playing')),
+                record.get('position_ms'), self.name, record.get('playback')
+            )]
+        else:
+            # Raw snapshot: the clock re-sync tells us whether it was a seek
+            self.store.push(record)
+            clock = self.store.clock
+            events = diff_playback(self._previous, record, self.name,
+                                   seek_threshold_ms=clock.max_slew_ms, drift_ms=clock.drift_ms)
+
+        for event in events:
+            if is_event and not await self._apply(event):
+                continue
+            await self._emit(event)
+        self._previous = self.store.snapshot
+
+
+class AdaptivePollScheduler:
+    # Decides how long the polling source sleeps between Web API requests.
+    #
+    # Mid-track nothing changes until the predicted end of the song, so it
+    # sleeps up to `max_interval` and wakes just after the clock says the
+    # track is over. Paused and idle players are polled with an increasing
+    # backoff, and a 429 Retry-After recorded by the store always wins.
+
+    def __init__(self, store: PlaybackStore, min_interval: float = 1.0,
+                 max_interval: float = 10.0, near_end_window: float = 5.0,
+                 end_margin: float = 0.5, paused_interval: float = 5.0,
+                 idle_interval: float = 15.0, max_idle_interval: float = 30.0):
+        self.store = store
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near_end_window = near_end_window
+        self.end_margin = end_margin
+        self.paused_interval = paused_interval
+        self.idle_interval = idle_interval
+        self.max_idle_interval = max_idle_interval
+        self._idle_polls = 0
+
+        # Metrics
+        self.cadence = min_interval
+        self.reason = 'startup'
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next poll, also recorded as `cadence`"""
+        clock = self.store.clock
+        if self.store.snapshot is None or not clock.track_id:
+            self._idle_polls += 1
+            delay = self.idle_interval * 2 ** (self._idle_polls - 1)
+            reason = 'idle'
+        elif not clock.is_playing:
+            self._idle_polls += 1
+            delay = self.paused_interval * 1.5 ** (self._idle_polls - 1)
+            reason = 'paused'
+        else:
+            self._idle_polls = 0
+            remaining = clock.remaining_ms / 1000
+            if remaining <= self.near_end_window:
+                delay = remaining + self.end_margin
+                reason = 'track end'
+            else:
+                delay = min(self.max_interval, remaining - self.near_end_window)
+                reason = 'mid-track'
+
+        if reason in ('idle', 'paused'):
+            delay = min(delay, self.max_idle_interval)
+        delay = max(self.min_interval, delay)
+
+        if self.store.retry_after > delay:
+            delay = self.store.retry_after
+            reason = 'rate limited'
+
+        self.cadence = delay
+        self.reason = reason
+        return delay
+
+    def reset(self) -> None:
+        """Forget the idle backoff, e.g. after a local user action"""
+        self._idle_polls = 0
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            'cadence': self.cadence,
+            'reason': self.reason,
+            'fetch_count': self.store.fetch_count,
+            'rate_limited_count': self.store.rate_limited_count,
+        }
+
+
+class PollingEventSource(PlaybackEventSource):
+    # Polls the Web API through the shared store and derives events from
+    # consecutive snapshots. Fallback when no cheaper local signal exists.
+    # The cadence comes from an AdaptivePollScheduler, `interval` is its floor.
+
+    name = 'poll'
+
+    def __init__(self, store: PlaybackStore, interval: float = 1.0,
+                 scheduler: Optional[AdaptivePollScheduler] = None):
+        super().__init__(store)
+        self.scheduler = scheduler or AdaptivePollScheduler(store, min_interval=interval)
+        self._pending: List[dict] = []
+        self._subscription = f'events-{id(self)}'
+
+    async def start(self) -> bool:
+        self.store.subscribe(self._subscription, self._onSnapshot, select_timing)
+        self._previous = self.store.snapshot
+        return await super().start()
+
+    async def stop(self) -> None:
+        self.store.unsubscribe(self._subscription)
+        await super().stop()
+
+    def _onSnapshot(self, playback: Optional[dict]) -> None:
+        clock = self.store.clock
+        self._pending.extend(diff_playback(
+            self._previous, playback, self.name,
+            seek_threshold_ms=clock.max_slew_ms, drift_ms=clock.drift_ms
+        ))
+        self._previous = playback
+
+    async def run(self) -> None:
+        while True:
+            try:
+                # Skip the request if another consumer just refreshed the store
+                await self.store.get(max_age=self.scheduler.min_interval)
+                events, self._pending = self._pending, []
+                for event in events:
+                    await self._emit(event)
+            except Exception as e:
+                print(f"Error in polling event source: {e}")
+            await asyncio.sleep(self.scheduler.next_delay())
+
+
+class MprisEventSource(PlaybackEventSource):
+    # Listens to the Spotify desktop client over D-Bus (MPRIS2). Play state and
+    # seeks arrive as signals for free; a track change costs one Web API
+    # request to fetch the full metadata. Requires the optional dbus-next package.
+
+    name = 'mpris'
+    BUS_NAME = 'org.mpris.MediaPlayer2.spotify'
+    OBJECT_PATH = '/org/mpris/MediaPlayer2'
+    PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+
+    def __init__(self, store: PlaybackStore, bus_name: str = BUS_NAME):
+        super().__init__(store)
+        self.bus_name = bus_name
+        self._bus = None
+        self._player = None
+        self._track_id: Optional[str] = None
+        self._is_playing = False
+
+    @staticmethod
+    def _track_id_from_metadata(metadata: dict) -> Optional[str]:
+        # 'spotify:track:<id>' on older clients, '/com/spotify/track/<id>' on newer
+        track = metadata.get('mpris:trackid')
+        if track is None:
+            return None
+        track = str(getattr(track, 'value', track))
+        return track.replace('/', ':').rsplit(':', 1)[-1] or None
+
+    async def start(self) -> bool:
+        if MessageBus is None:
+            print("[bold yellow]dbus-next is not installed, MPRIS events unavailable[/bold yellow]")
+            return False
+        try:
+            self._bus = await MessageBus().connect()
+            introspection = await self._bus.introspect(self.bus_name, self.OBJECT_PATH)
+            proxy = self._bus.get_proxy_object(self.bus_name, self.OBJECT_PATH, introspection)
+            self._player = proxy.get_interface(self.PLAYER_INTERFACE)
+            properties = proxy.get_interface('org.freedesktop.DBus.Properties')
+
+            self._track_id = self._track_id_from_metadata(await self._player.get_metadata())
+            self._is_playing = (await self._player.get_playback_status()) == 'Playing'
+
+            properties.on_properties_changed(self._onPropertiesChanged)
+            self._player.on_seeked(self._onSeeked)
+        except Exception as e:
+            print(f"[bold yellow]MPRIS player not available: {e}[/bold yellow]")
+            if self._bus:
+                self._bus.disconnect()
+                self._bus = None
+            return False
+        return await super().start()
+
+    async def run(self) -> None:
+        # Events arrive as D-Bus signals, nothing to do but stay connected
+        await self._bus.wait_for_disconnect()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._bus:
+            self._bus.disconnect()
+            self._bus = None
+
+    async def _dispatch(self, event: dict) -> None:
+        if await self._apply(event):
+            await self._emit(event)
+
+    def _onPropertiesChanged(self, interface: str, changed: dict, invalidated: list) -> None:
+        if interface != self.PLAYER_INTERFACE:
+            return
+        if 'Metadata' in changed:
+            track_id = self._track_id_from_metadata(changed['Metadata'].value)
+            if track_id != self._track_id:
+                self._track_id = track_id
+                asyncio.ensure_future(self._dispatch(
+                    make_event(TRACK_CHANGED, track_id, self._is_playing, 0, self.name)
+                ))
+        if 'PlaybackStatus' in changed:
+            is_playing = changed['PlaybackStatus'].value == 'Playing'
+            if is_playing != self._is_playing:
+                self._is_playing = is_playing
+                asyncio.ensure_future(self._dispatch(make_event(
+                    PLAY_STATE_CHANGED, self._track_id, is_playing,
+                    self.store.clock.position(), self.name
+                )))
+
+    def _onSeeked(self, position_us: int) -> None:
+        asyncio.ensure_future(self._dispatch(make_event(
+            SEEKED, self._track_id, self._is_playing, position_us // 1000, self.name
+        )))
+
+
+class SocketEventSource(PlaybackEventSource):
+    # Local TCP endpoint accepting newline-delimited JSON from any bridge
+    # (a player plugin, a script, another machine on the LAN). Each line is
+    # either a normalized event or a raw current_playback() snapshot.
+
+    name = 'socket'
+
+    def __init__(self, store: PlaybackStore, host: str = '127.0.0.1', port: int = 8974):
+        super().__init__(store)
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self) -> bool:
+        try:
+            self._server = await asyncio.start_server(self._onClient, self.host, self.port)
+        except OSError as e:
+            print(f"[bold red]Could not listen on {self.host}:{self.port}: {e}[/bold red]")
+            return False
+        return await super().start()
+
+    async def run(self) -> None:
+        # Clients are handled by _onClient as they connect
+        await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _onClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                await self.feed(line)
+        finally:
+            writer.close()
+
+    async def feed(self, line: Union[str, bytes]) -> None:
+        """Handle one JSON line, an event or a snapshot"""
+        for record in parse_records(line, self.name):
+            await self._handleRecord(record)
+
+
+class ReplayEventSource(PlaybackEventSource):
+    # Replays a JSON-lines recording from a file or named pipe, for tests and
+    # load-testing the UI without Spotify. Records are the same as the socket
+    # source takes and may carry an `at` field (ms since the start of the
+    # replay) to reproduce the original timing. fixtures/playback_session.jsonl
+    # is a short example session.
+
+    name = 'replay'
+
+    def __init__(self, store: PlaybackStore, path: Union[str, Path],
+                 speed: float = 1.0, loop: bool = False):
+        super().__init__(store)
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+
+    async def start(self) -> bool:
+        if not self.path.exists():
+            print(f"[bold red]Replay file not found: {self.path}[/bold red]")
+            return False
+        return await super().start()
+
+    async def run(self) -> None:
+        while True:
+            started = time.monotonic()
+            # Read line by line so a pipe can be fed while we replay it
+            loop = asyncio.get_event_loop()
+            with open(self.path, 'r', encoding='utf-8') as f:
+                while line := await loop.run_in_executor(None, f.readline):
+                    for record in parse_records(line, self.name):
+                        at = record.get('at') if isinstance(record, dict) else None
+                        if at is not None and self.speed > 0:
+                            delay = at / 1000 / self.speed - (time.monotonic() - started)
+                            if delay > 0:
+                                await asyncio.sleep(delay)
+                        await self._handleRecord(record)
+            if not self.loop:
+                break
+
+
+def create_event_source(store: PlaybackStore, spec: Optional[str] = None) -> PlaybackEventSource:
+    """
+    Build an event source from a short spec, e.g. the PLAYBACK_SOURCE env variable
+
+    Args:
+        spec: 'poll' (default), 'mpris', 'socket[:port]' or 'replay:<path>'
+
+    Returns:
+        PlaybackEventSource: the requested backend
+    """
+    kind, _, argument = (spec or 'poll').partition(':')
+    kind = kind.strip().lower()
+    if kind == 'mpris':
+        return MprisEventSource(store)
+    if kind == 'socket':
+        return SocketEventSource(store, port=int(argument)) if argument else SocketEventSource(store)
+    if kind == 'replay' and argument:
+        return ReplayEventSource(store, argument)
+    if kind != 'poll':
+        print(f"[bold yellow]Unknown playback source '{spec}', polling instead[/bold yellow]")
+    return PollingEventSource(store)
@@ -0,0 +1,435 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Optional
+
+from rich import print
+from spotipy import SpotifyException
+
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+# Selectors used to decide whether a consumer cares about a new snapshot.
+# Each one reduces a raw /me/player response to the part a consumer renders.
+def select_track_id(playback: Optional[dict]) -> Optional[str]:
+    if not playback or not playback.get('item'):
+        return None
+    return playback['item'].get('id')
+
+
+def select_is_playing(playback: Optional[dict]) -> bool:
+    return bool(playback and playback.get('is_playing'))
+
+
+def select_seeks(playback: Optional[dict]) -> int:
+    # Seeks seen by the store's clock up to this snapshot; a count rather
+    # than a flag, so two seeks in a row are still two changes
+    if not playback:
+        return 0
+    return playback.get('seeks', 0)
+
+
+def select_timing(playback: Optional[dict]) -> tuple:
+    # Everything that moves the playback clock other than time itself:
+    # progress only counts when it jumped, the clock absorbs small drift
+    return (select_track_id(playback), select_is_playing(playback), select_seeks(playback))
+
+
+def select_album_id(playback: Optional[dict]) -> Optional[str]:
+    if not playback or not playback.get('item'):
+        return None
+    return playback['item'].get('album', {}).get('id')
+
+
+def select_cover_image(images: list, target_px: Optional[int] = None) -> Optional[dict]:
+    # Smallest variant that still covers `target_px` device pixels. Spotify
+    # lists them largest first (640, 300, 64); without a target, or when
+    # the sizes are unknown, the largest one wins
+    if not images:
+        return None
+    sized = [image for image in images if image.get('width')]
+    if not target_px or not sized:
+        return images[0]
+    fitting = [image for image in sized if image['width'] >= target_px]
+    if not fitting:
+        return max(sized, key=lambda image: image['width'])
+    return min(fitting, key=lambda image: image['width'])
+
+
+def select_cover_url(playback: Optional[dict], target_px: Optional[int] = None) -> Optional[str]:
+    if not playback or not playback.get('item'):
+        return None
+    image = select_cover_image(playback['item'].get('album', {}).get('images') or [], target_px)
+    return image['url'] if image else None
+
+
+class PlaybackClock:
+    # Local estimate of the playback position between polls.
+    #
+    # Seeded from `progress_ms` of each snapshot and advanced with a monotonic
+    # clock while playing, so the UI can read a position every frame without
+    # touching the API. Small disagreements with a fresh snapshot are treated
+    # as drift and corrected gradually, large ones as a seek and applied as-is.
+
+    def __init__(self, max_slew_ms: float = 1000.0):
+        self.max_slew_ms = max_slew_ms
+        self.track_id: Optional[str] = None
+        self.duration_ms = 0
+        self.is_playing = False
+        self.drift_ms = 0.0
+        # Re-syncs within one track that moved the position by more than
+        # `max_slew_ms`
+        self.seeks = 0
+        self._anchor_position = 0.0
+        self._anchor_time = time.monotonic()
+
+    def position(self, now: Optional[float] = None) -> int:
+        """Extrapolated playback position in milliseconds"""
+        if now is None:
+            now = time.monotonic()
+        position = self._anchor_position
+        if self.is_playing:
+            position += (now - self._anchor_time) * 1000
+        if self.duration_ms:
+            position = min(position, self.duration_ms)
+        return max(0, int(position))
+
+    @property
+    def fraction(self) -> float:
+        """Extrapolated progress through the current track (0-1)"""
+        if not self.duration_ms:
+            return 0.0
+        return self.position() / self.duration_ms
+
+    @property
+    def remaining_ms(self) -> int:
+        return max(0, self.duration_ms - self.position())
+
+    def sync(self, playback: Optional[dict], rtt: float = 0.0) -> None:
+        """
+        Re-seed the clock from a fresh playback snapshot
+
+        Args:
+            playback: raw current_playback() response
+            rtt: round trip time of the request that produced it, in seconds
+        """
+        now = time.monotonic()
+        if not playback or not playback.get('item'):
+            self.track_id = None
+            self.duration_ms = 0
+            self.is_playing = False
+            self._anchor_position = 0.0
+            self._anchor_time = now
+            return
+
+        track_id = playback['item'].get('id')
+        is_playing = bool(playback.get('is_playing'))
+        observed = float(playback.get('progress_ms') or 0)
+
+        if is_playing:
+            # `timestamp` is when the server sampled the state. Trust it only if
+            # it falls inside the request window, otherwise it is either clock
+            # skew or the time of the last state change and half the RTT is the
+            # better guess for how stale the progress is.
+            age = rtt / 2
+            timestamp = playback.get('timestamp')
+            if timestamp:
+                wall_age = time.time() - timestamp / 1000
+                if 0 <= wall_age <= rtt:
+                    age = wall_age
+            observed += age * 1000
+
+        predicted = self.position(now)
+        self.drift_ms = observed - predicted
+        if track_id == self.track_id and abs(self.drift_ms) > self.max_slew_ms:
+            self.seeks += 1
+        if (track_id == self.track_id and is_playing and self.is_playing
+                and abs(self.drift_ms) <= self.max_slew_ms):
+            # Drift, not a seek: close half the gap now to avoid visible jumps
+            observed = predicted + self.drift_ms / 2
+
+        self.track_id = track_id
+        self.duration_ms = playback['item'].get('duration_ms') or 0
+        self.is_playing = is_playing
+        self._anchor_position = observed
+        self._anchor_time = now
+
+
+class PlaybackStore:
+    # Shared snapshot of the current playback state.
+    #
+    # Every consumer (progress bar, lyrics, song info, cover) reads from here
+    # instead of calling current_playback() on its own. A snapshot younger
+    # than `ttl` seconds is served from memory, concurrent refreshes share a
+    # single HTTP request, and subscribers are notified only when the part
+    # of the snapshot they selected actually changed. `clock` extrapolates the
+    # position between fetches so the TTL can be several seconds long.
+    #
+    # Transport commands are applied optimistically: optimistic() publishes
+    # the expected state at once and every snapshot that arrives afterwards
+    # is reconciled with it. A snapshot that agrees confirms the change; one
+    # that disagrees is taken as older than the command and overlaid until
+    # `grace` seconds after the command was acknowledged, or until verify()
+    # re-reads the player, then it wins and the optimistic state is rolled
+    # back.
+
+    # How far a confirming snapshot's progress may be from the expected one
+    PROGRESS_TOLERANCE_MS = 2000
+
+    def __init__(self, api: AsyncSpotifyClient, ttl: float = 5.0, grace: float = 1.5,
+                 command_timeout: float = 10.0):
+        self.api = api
+        self.ttl = ttl
+        self.grace = grace
+        self.command_timeout = command_timeout
+        self.clock = PlaybackClock()
+        self._snapshot: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._subscribers: Dict[str, tuple] = {}
+        self._blocked_until = 0.0
+        # Pending optimistic change: token, fields, started, deadline
+        self._optimistic: Optional[dict] = None
+        self._optimistic_token = 0
+        self.fetch_count = 0
+        self.rate_limited_count = 0
+        self.confirmed_count = 0
+        self.rolled_back_count = 0
+
+    @property
+    def snapshot(self) -> Optional[dict]:
+        """Last fetched playback state, without triggering a request"""
+        return self._snapshot
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last successful fetch"""
+        if not self._fetched_at:
+            return float('inf')
+        return time.monotonic() - self._fetched_at
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds left before the API may be called again after a 429"""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    async def get(self, max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        Return the current playback state, fetching only if the cached one is stale
+
+        Args:
+            max_age: optional override of the store TTL for this read
+
+        Returns:
+            dict: raw current_playback() response, or None if nothing is playing
+        """
+        ttl = self.ttl if max_age is None else max_age
+        # A track that should have ended by now means the snapshot is stale,
+        # but never refetch more than once a second while waiting for the next one
+        track_over = self.clock.is_playing and self.clock.remaining_ms == 0
+        if self.age < ttl and not (track_over and self.age >= 1.0):
+            return self._snapshot
+        return await self.refresh()
+
+    async def refresh(self) -> Optional[dict]:
+        """Force a fetch, joining one that is already in flight"""
+        if self.retry_after > 0:
+            # Rate limited, serve the stale snapshot until Retry-After has passed
+            return self._snapshot
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Optional[dict]:
+        try:
+            started = time.monotonic()
+            playback = await self.api.current_playback()
+            rtt = time.monotonic() - started
+            self.fetch_count += 1
+        except SpotifyException as e:
+            if e.http_status != 429:
+                print(f"[bold red]Error fetching playback state: {e}[/bold red]")
+                return self._snapshot
+            headers = getattr(e, 'headers', None) or {}
+            try:
+                retry_after = float(headers.get('Retry-After', 1))
+            except (TypeError, ValueError):
+                retry_after = 1.0
+            self._blocked_until = time.monotonic() + retry_after
+            self.rate_limited_count += 1
+            print(f"[bold yellow]Rate limited, retrying playback fetch in {retry_after:.0f}s[/bold yellow]")
+            return self._snapshot
+        except Exception as e:
+            print(f"[bold red]Error fetching playback state: {e}[/bold red]")
+            return self._snapshot
+
+        self.push(playback, rtt)
+        return playback
+
+    def push(self, playback: Optional[dict], rtt: float = 0.0) -> None:
+        """
+        Replace the snapshot with one obtained elsewhere (event sources, replays)
+
+        Counts as a fresh fetch, so it also postpones the next HTTP request.
+        """
+        self._fetched_at = time.monotonic()
+        self._replace(self._reconcile(playback), rtt)
+
+    def patch(self, **fields) -> None:
+        """
+        Update fields of the current snapshot from a partial local signal
+
+        Used for seeks and play/pause reported without a full playback state.
+        Unlike push() this does not reset the TTL, the next poll still happens.
+        """
+        if not self._snapshot:
+            return
+        self._replace({**self._snapshot, **fields})
+
+    def _replace(self, playback: Optional[dict], rtt: float = 0.0) -> None:
+        # Re-sync the clock to a new snapshot, stamp it with the clock's seek
+        # count (see select_seeks) and notify subscribers
+        previous = self._snapshot
+        self.clock.sync(playback, rtt)
+        if playback:
+            playback = {**playback, 'seeks': self.clock.seeks}
+        self._snapshot = playback
+        self._publish(previous, playback)
+
+    # Optimistic updates
+
+    def optimistic(self, **fields) -> Optional[int]:
+        """
+        Show the state a transport command is expected to produce, right now
+
+        Args:
+            fields: snapshot fields the command changes (is_playing,
+                progress_ms, item)
+
+        Returns:
+            int: token for settle(), or None when there is no snapshot to change
+        """
+        if not self._snapshot:
+            return None
+        self._optimistic_token += 1
+        now = time.monotonic()
+        previous = self._snapshot
+        self._optimistic = {
+            'token': self._optimistic_token,
+            'fields': fields,
+            'started': now,
+            # Until the command is acknowledged, disagreeing snapshots are older than it
+            'deadline': now + self.command_timeout,
+            # What a failed command puts back
+            'restore': {field: previous.get(field) for field in fields},
+            'position': self.clock.position(now),
+            'was_playing': self.clock.is_playing
+        }
+        # The snapshot's own progress is as old as the last fetch
+        self._replace({**previous, 'progress_ms': self._optimistic['position'], **fields})
+        return self._optimistic_token
+
+    def settle(self, token: Optional[int], ok: bool) -> None:
+        """
+        Report how the command behind an optimistic change went
+
+        On success disagreeing snapshots are still overlaid for `grace`
+        seconds, the player takes a moment to apply a command. On failure the
+        previous state is put back at once.
+        """
+        pending = self._optimistic
+        if pending is None or pending['token'] != token:
+            # Superseded by a newer command, or already reconciled
+            return
+        now = time.monotonic()
+        if ok:
+            pending['deadline'] = now + self.grace
+            return
+
+        self._optimistic = None
+        self.rolled_back_count += 1
+        restore = dict(pending['restore'])
+        elapsed = (now - pending['started']) * 1000 if pending['was_playing'] else 0
+        restore['progress_ms'] = int(pending['position'] + elapsed)
+        self._replace({**self._snapshot, **restore})
+
+    async def verify(self, token: Optional[int]) -> Optional[dict]:
+        """
+        Re-read the player after a command was acknowledged and let its
+        answer decide, instead of waiting for `grace` to run out
+        """
+        if self._inflight is not None and not self._inflight.done():
+            # Possibly sampled before the command was applied, not an answer
+            await asyncio.shield(self._inflight)
+        pending = self._optimistic
+        if pending is None or pending['token'] != token:
+            return self._snapshot
+        pending['deadline'] = time.monotonic()
+        return await self.refresh()
+
+    def _expected(self, pending: dict, now: float) -> dict:
+        # The optimistic fields as they should look by `now`
+        fields = dict(pending['fields'])
+        if 'progress_ms' in fields and fields.get('is_playing', self.clock.is_playing):
+            fields['progress_ms'] += int((now - pending['started']) * 1000)
+        return fields
+
+    def _agrees(self, playback: Optional[dict], expected: dict) -> bool:
+        if not playback:
+            return False
+        for field, value in expected.items():
+            if field == 'item':
+                if select_track_id(playback) != (value or {}).get('id'):
+                    return False
+            elif field == 'progress_ms':
+                progress = playback.get('progress_ms')
+                if progress is None or abs(progress - value) > self.PROGRESS_TOLERANCE_MS:
+                    return False
+            elif playback.get(field) != value:
+                return False
+        return True
+
+    def _reconcile(self, playback: Optional[dict]) -> Optional[dict]:
+        pending = self._optimistic
+        if pending is None:
+            return playback
+        now = time.monotonic()
+        expected = self._expected(pending, now)
+        if self._agrees(playback, expected):
+            self._optimistic = None
+            self.confirmed_count += 1
+            return playback
+        if now < pending['deadline'] and playback:
+            # Sampled before the player applied the command, keep showing it
+            return {**playback, **expected}
+        self._optimistic = None
+        self.rolled_back_count += 1
+        print("[bold yellow]Player did not follow the last command, showing its actual state[/bold yellow]")
+        return playback
+
+    def subscribe(self, name: str, callback: Callable,
+                  selector: Callable[[Optional[dict]], Any] = lambda playback: playback) -> None:
+        """
+        Register a consumer for snapshot changes
+
+        Args:
+            name: unique consumer name, re-subscribing replaces the old callback
+            callback: called with the new snapshot; may be a coroutine function
+            selector: reduces a snapshot to the value this consumer cares about,
+                the callback only fires when that value changes
+        """
+        self._subscribers[name] = (callback, selector)
+
+    def unsubscribe(self, name: str) -> None:
+        self._subscribers.pop(name, None)
+
+    def _publish(self, previous: Optional[dict], current: Optional[dict]) -> None:
+        for name, (callback, selector) in list(self._subscribers.items()):
+            try:
+                if selector(previous) == selector(current) and previous is not None:
+                    continue
+                result = callback(current)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print(f"[bold red]Error notifying '{name}' of playback change: {e}[/bold red]")
@@ -0,0 +1,221 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from rich import print
+from spotipy import SpotifyException
+
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+def compact_playlist(playlist: Dict) -> Dict:
+    # The few fields the app uses out of a simplified playlist object
+    owner = playlist.get('owner') or {}
+    return {
+        'id': playlist['id'],
+        'name': playlist.get('name') or '',
+        'uri': playlist.get('uri') or f"spotify:playlist:{playlist['id']}",
+        'snapshot_id': playlist.get('snapshot_id'),
+        'owner_id': owner.get('id'),
+        'collaborative': bool(playlist.get('collaborative')),
+        'tracks_total': (playlist.get('tracks') or {}).get('total', 0)
+    }
+
+
+class PlaylistCatalog:
+    # The user's playlists, cached by ID and by lowercase name.
+    #
+    # A refresh reads page 0 for the total and the remaining pages
+    # concurrently. Track URIs of a playlist are fetched on demand and kept
+    # for as long as its snapshot_id: a refresh that finds a new one drops
+    # them, while our own writes record the snapshot_id Spotify returns for
+    # them and are not mistaken for outside changes. The catalog is reused
+    # for `ttl` seconds and the user profile for the whole session.
+
+    PAGE_SIZE = 50
+    ITEMS_PAGE_SIZE = 100
+
+    def __init__(self, api: AsyncSpotifyClient, ttl: float = 300.0, concurrency: int = 4):
+        self.api = api
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._by_id: Dict[str, Dict] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._profile: Optional[Dict] = None
+        # playlist ID -> (snapshot_id, track URIs)
+        self._contents: Dict[str, Tuple[Optional[str], Set[str]]] = {}
+        self._inflight: Optional[asyncio.Future] = None
+        self._refreshed_at: Optional[float] = None
+        # Bumped whenever the catalog contents change
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def playlists(self) -> List[Dict]:
+        return list(self._by_id.values())
+
+    @property
+    def age(self) -> float:
+        if self._refreshed_at is None:
+            return float('inf')
+        return time.monotonic() - self._refreshed_at
+
+    # Profile
+
+    async def profile(self) -> Dict:
+        """The current user's profile, fetched once per session"""
+        if self._profile is None:
+            self._profile = await self.api.me()
+        return self._profile
+
+    async def can_edit(self, playlist: Dict) -> bool:
+        """Whether the user may add tracks to `playlist`"""
+        if playlist['collaborative']:
+            return True
+        return playlist['owner_id'] == (await self.profile()).get('id')
+
+    # Lookups
+
+    def get(self, playlist_id: str) -> Optional[Dict]:
+        return self._by_id.get(playlist_id)
+
+    def by_name(self, name: str) -> Optional[Dict]:
+        """Cached playlist named `name`, case-insensitively; the owned one wins over follows"""
+        ids = self._by_name.get(name.strip().lower())
+        if not ids:
+            return None
+        playlists = [self._by_id[playlist_id] for playlist_id in ids]
+        user_id = (self._profile or {}).get('id')
+        return next((playlist for playlist in playlists if playlist['owner_id'] == user_id), playlists[0])
+
+    async def find(self, name: str) -> Optional[Dict]:
+        """
+        Playlist named `name`, refreshing the catalog if it is stale
+
+        A miss on a catalog older than a few seconds refreshes once more, the
+        playlist may have been created since.
+        """
+        if self.age > self.ttl:
+            await self.refresh()
+        playlist = self.by_name(name)
+        if playlist is None and self.age > 5.0:
+            await self.refresh()
+            playlist = self.by_name(name)
+        return playlist
+
+    # Refresh
+
+    async def refresh(self) -> None:
+        """Re-list all playlists, joining a refresh that is already running"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _pages(self, fetch: Callable[[int], Awaitable[Dict]], page_size: int) -> List[Dict]:
+        # Page 0 for the total, then every other page at once
+        first = await fetch(0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(offset: int) -> Dict:
+            async with semaphore:
+                return await fetch(offset)
+
+        total = first.get('total', 0)
+        rest = await asyncio.gather(*(limited(offset) for offset in range(page_size, total, page_size)))
+        return [first, *rest]
+
+    async def _refresh(self) -> None:
+        try:
+            pages = await self._pages(
+                lambda offset: self.api.current_user_playlists(limit=self.PAGE_SIZE, offset=offset),
+                self.PAGE_SIZE
+            )
+        except SpotifyException as e:
+            print(f"[bold red]Error listing playlists: {e}[/bold red]")
+            return
+
+        by_id, changed = {}, False
+        for page in pages:
+            for item in page.get('items', []):
+                if not item or not item.get('id'):
+                    continue
+                playlist = compact_playlist(item)
+                cached = self._by_id.get(playlist['id'])
+                if cached is not None and cached == playlist:
+                    # Unchanged, keep the cached object
+                    playlist = cached
+                else:
+                    changed = True
+                    if cached is not None and cached['snapshot_id'] != playlist['snapshot_id']:
+                        # Edited elsewhere, the cached track URIs are stale
+                        self._contents.pop(playlist['id'], None)
+                by_id[playlist['id']] = playlist
+
+        removed = self._by_id.keys() - by_id.keys()
+        for playlist_id in removed:
+            self._contents.pop(playlist_id, None)
+        if changed or removed:
+            self._index(by_id)
+        self._refreshed_at = time.monotonic()
+
+    def _index(self, by_id: Dict[str, Dict]) -> None:
+        self._by_id = by_id
+        self._by_name = {}
+        for playlist in by_id.values():
+            self._by_name.setdefault(playlist['name'].strip().lower(), []).append(playlist['id'])
+        self.revision += 1
+
+    # Contents
+
+    async def contents(self, playlist_id: str) -> Set[str]:
+        """URIs of the tracks in a playlist, refetched only when its snapshot_id changed"""
+        playlist = self._by_id.get(playlist_id)
+        snapshot_id = playlist['snapshot_id'] if playlist else None
+        cached = self._contents.get(playlist_id)
+        if cached is not None and snapshot_id is not None and cached[0] == snapshot_id:
+            return cached[1]
+
+        pages = await self._pages(
+            lambda offset: self.api.playlist_items(
+                playlist_id, fields='items(track(uri)),total', limit=self.ITEMS_PAGE_SIZE, offset=offset
+            ),
+            self.ITEMS_PAGE_SIZE
+        )
+        uris = {
+            item['track']['uri'] for page in pages for item in page.get('items', [])
+            if item and item.get('track') and item['track'].get('uri')
+        }
+        self._contents[playlist_id] = (snapshot_id, uris)
+        return uris
+
+    # Our own writes
+
+    def note_write(self, playlist_id: str, snapshot_id: Optional[str], uris: List[str] = ()) -> None:
+        """
+        Record tracks we added and the snapshot_id the write returned, so the
+        next refresh does not report the playlist as changed and the cached
+        contents stay valid
+        """
+        playlist = self._by_id.get(playlist_id)
+        if playlist is None:
+            return
+        cached = self._contents.get(playlist_id)
+        if cached is not None and cached[0] == playlist['snapshot_id'] and snapshot_id:
+            cached[1].update(uris)
+            self._contents[playlist_id] = (snapshot_id, cached[1])
+        if snapshot_id:
+            playlist['snapshot_id'] = snapshot_id
+        playlist['tracks_total'] += len(uris)
+
+    def invalidate(self, playlist_id: str) -> None:
+        """Drop the cached track URIs of a playlist, e.g. after a write with an unknown outcome"""
+        self._contents.pop(playlist_id, None)
+
+    def forget(self, playlist_id: str) -> None:
+        """Drop a playlist that turned out to be deleted or unfollowed"""
+        self._contents.pop(playlist_id, None)
+        if playlist_id in self._by_id:
+            by_id = dict(self._by_id)
+            del by_id[playlist_id]
+            self._index(by_id)
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QStandardPaths
+from rich import print
+from spotipy import SpotifyException
+
+from PlaylistCatalog import PlaylistCatalog
+from SpotifyWebClient import AsyncSpotifyClient
+
+
+# Target of saves to the user's library, playlists are "playlist:<id>"
+LIBRARY = 'library'
+
+
+def playlist_target(playlist_id: str) -> str:
+    return f"playlist:{playlist_id}"
+
+
+class PlaylistWriteQueue:
+    # Write-behind queue for playlist additions and library saves.
+    #
+    # Additions are collected per target and sent `flush_delay` seconds after
+    # the first one, so a curation session becomes one request per 100
+    # tracks and playlist (50 for the library) instead of one per track.
+    # Tracks already in the playlist (cached contents, revalidated by
+    # snapshot_id) are skipped; library saves are only deduplicated within
+    # the queue, saving a saved track is harmless. Rate limits and
+    # server errors are retried by rescheduling the flush with backoff, the
+    # only retry layer: an addition that failed with an unknown outcome may
+    # have been applied, so the playlist is re-read before it is sent again.
+    # Pending writes are mirrored to a JSON file, written atomically, so they
+    # survive a crash and are sent on the next start.
+
+    BATCH_SIZES = {LIBRARY: 50}
+    PLAYLIST_BATCH_SIZE = 100
+    MAX_BACKOFF = 300.0
+
+    def __init__(self, api: AsyncSpotifyClient, catalog: PlaylistCatalog,
+                 path: Optional[Path] = None, flush_delay: float = 2.0):
+        if path is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+            path = Path(base or Path.home() / '.local' / 'share' / 'ZZZApp') / 'pending_writes.json'
+        self.api = api
+        self.catalog = catalog
+        self.path = Path(path)
+        self.flush_delay = flush_delay
+        # target -> URIs in the order they were added, without duplicates
+        self._pending: Dict[str, List[str]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._closed = False
+        self._failures = 0
+        self.requests_sent = 0
+        self.tracks_written = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return sum(len(uris) for uris in self._pending.values())
+
+    # Persistence
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._pending = {target: list(uris) for target, uris in json.load(f).items() if uris}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"[bold red]Ignoring unreadable pending writes {self.path}: {e}[/bold red]")
+            return
+        if self._pending:
+            print(f"{len(self)} playlist/library writes pending from the last session")
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_name(self.path.name + '.tmp')
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(self._pending, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(f"[bold red]Error saving pending writes: {e}[/bold red]")
+
+    # Queueing
+
+    def add_to_playlist(self, playlist_id: str, uris: List[str]) -> None:
+        """Queue tracks for a playlist"""
+        self._enqueue(playlist_target(playlist_id), uris)
+
+    def save_tracks(self, uris: List[str]) -> None:
+        """Queue tracks for the user's library"""
+        self._enqueue(LIBRARY, uris)
+
+    def _enqueue(self, target: str, uris: List[str]) -> None:
+        pending = self._pending.setdefault(target, [])
+        queued = set(pending)
+        pending.extend(uri for uri in dict.fromkeys(uris) if uri not in queued)
+        self._save()
+        self.schedule(self.flush_delay)
+
+    def schedule(self, delay: float) -> None:
+        """Flush in `delay` seconds, unless a flush is already scheduled or the queue is closed"""
+        if self._closed:
+            return
+        if self._pending and (self._timer is None or self._timer.done()):
+            self._timer = asyncio.ensure_future(self._flushLater(delay))
+
+    async def _flushLater(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Lets the flush schedule its own follow-up
+        self._timer = None
+        await self.flush()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        Send what is pending, e.g. at shutdown; anything unsent stays on disk
+
+        Nothing is scheduled afterwards and no flush is left running.
+        """
+        self._closed = True
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[bold yellow]{len(self)} writes left for the next session[/bold yellow]")
+        finally:
+            if self._inflight is not None and not self._inflight.done():
+                self._inflight.cancel()
+
+    async def _drain(self) -> None:
+        # A flush that is already running, then one more for whatever was
+        # queued after it started. Awaited unshielded, so a timeout in
+        # close() cancels the flush itself
+        for _ in range(2):
+            if self._inflight is None or self._inflight.done():
+                if not self._pending:
+                    return
+                self._inflight = asyncio.ensure_future(self._flush())
+            await self._inflight
+
+    # Flushing
+
+    async def flush(self) -> int:
+        """
+        Send every pending write now, joining a flush that is already running
+
+        Returns:
+            int: number of tracks written
+        """
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._flush())
+        return await asyncio.shield(self._inflight)
+
+    async def _flush(self) -> int:
+        written, retry_after = 0, None
+        for target in list(self._pending):
+            uris = list(self._pending.get(target, ()))
+            try:
+                fresh = await self._dedupe(target, uris)
+                size = self.BATCH_SIZES.get(target, self.PLAYLIST_BATCH_SIZE)
+                for start in range(0, len(fresh), size):
+                    batch = fresh[start:start + size]
+                    await self._send(target, batch)
+                    written += len(batch)
+                    self._remove(target, batch)
+                # Whatever is left was a duplicate
+                self._remove(target, uris)
+            except SpotifyException as e:
+                if self._retryable(e):
+                    retry_after = max(retry_after or 0.0, self._retryAfter(e))
+                    if target != LIBRARY and e.http_status >= 500:
+                        # The tracks may have been added after all
+                        self.catalog.invalidate(target.split(':', 1)[1])
+                    print(f"[bold yellow]Write to {target} failed, will retry: {e}[/bold yellow]")
+                else:
+                    # Deleted playlist, no permission: retrying cannot help
+                    print(f"[bold red]Dropping {len(self._pending.get(target, ()))} writes to {target}: {e}[/bold red]")
+                    self._remove(target, uris)
+                    if target != LIBRARY and e.http_status == 404:
+                        self.catalog.forget(target.split(':', 1)[1])
+
+        self.tracks_written += written
+        if retry_after is not None:
+            self._failures += 1
+            backoff = min(self.MAX_BACKOFF, self.flush_delay * 2 ** self._failures)
+            self.schedule(max(backoff, retry_after))
+        else:
+            self._failures = 0
+            # Tracks queued while this flush was running
+            self.schedule(self.flush_delay)
+        return written
+
+    def _remove(self, target: str, uris: List[str]) -> None:
+        done = set(uris)
+        remaining = [uri for uri in self._pending.get(target, ()) if uri not in done]
+        if remaining:
+            self._pending[target] = remaining
+        else:
+            self._pending.pop(target, None)
+        self._save()
+
+    async def _dedupe(self, target: str, uris: List[str]) -> List[str]:
+        if target == LIBRARY:
+            # The local index can be out of date and PUT /me/tracks is idempotent
+            return uris
+        existing = await self.catalog.contents(target.split(':', 1)[1])
+        return [uri for uri in uris if uri not in existing]
+
+    @staticmethod
+    def _retryable(e: SpotifyException) -> bool:
+        # 599 is the client's code for timeouts and connection errors
+        return e.http_status == 429 or e.http_status >= 500
+
+    @staticmethod
+    def _retryAfter(e: SpotifyException) -> float:
+        if e.http_status != 429:
+            return 0.0
+        headers = getattr(e, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After', 0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    async def _send(self, target: str, batch: List[str]) -> None:
+        self.requests_sent += 1
+        if target == LIBRARY:
+            await self.api.current_user_saved_tracks_add(batch)
+            return
+        playlist_id = target.split(':', 1)[1]
+        result = await self.api.playlist_add_items(playlist_id, batch)
+        self.catalog.note_write(playlist_id, (result or {}).get('snapshot_id'), batch)
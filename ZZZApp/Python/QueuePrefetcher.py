@@ -0,0 +1,101 @@
+import asyncio
+from typing import List, Optional
+
+from rich import print
+
+from PlaybackStore import select_album_id, select_cover_url
+
+
+class QueuePrefetcher:
+    # Warms the caches for the tracks coming up next.
+    #
+    # After a track change the upcoming queue (/me/player/queue) is read and,
+    # for the next `depth` tracks, the cover is decoded at display size, the
+    # theme derived and the lyrics looked up, so when one of them starts the
+    # track pipeline finds everything cached. At most `concurrency` tracks
+    # are warmed at once, and a changed queue cancels the previous run.
+
+    def __init__(self, controller, depth: int = 3, concurrency: int = 2, start_delay: float = 1.0):
+        self.controller = controller
+        self.depth = depth
+        self.concurrency = concurrency
+        # Lets the current track's own pipeline go first
+        self.start_delay = start_delay
+        self._check: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._queued_ids: List[str] = []
+        # Tracks that play after the current one, for optimistic skips
+        self.upcoming: List[dict] = []
+        self.warmed_count = 0
+
+    def schedule(self) -> asyncio.Task:
+        """Re-read the queue in the background, restarting the warm-up only if it changed"""
+        if self._check is None or self._check.done():
+            self._check = asyncio.ensure_future(self._refresh())
+        return self._check
+
+    def cancel(self) -> None:
+        for task in (self._check, self._task):
+            if task and not task.done():
+                task.cancel()
+        self._check = self._task = None
+        self._queued_ids = []
+        self.upcoming = []
+
+    def take_next(self) -> Optional[dict]:
+        """The track a skip is expected to play, consumed so a second skip sees the one after"""
+        return self.upcoming.pop(0) if self.upcoming else None
+
+    async def _refresh(self) -> None:
+        try:
+            await asyncio.sleep(self.start_delay)
+            queue = await self.controller.api.queue()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[bold red]Error reading the queue: {e}[/bold red]")
+            return
+
+        # Episodes have no album art or lyrics to warm
+        tracks = [
+            item for item in (queue or {}).get('queue', [])
+            if item and item.get('type', 'track') == 'track' and item.get('id')
+        ][:self.depth]
+        # Only as far as the queue is tracks, an episode in between breaks the order
+        queued = (queue or {}).get('queue') or []
+        self.upcoming = []
+        for item, track in zip(queued, tracks):
+            if item is not track:
+                break
+            self.upcoming.append(track)
+        track_ids = [track['id'] for track in tracks]
+        if track_ids == self._queued_ids:
+            # Same queue, the running (or finished) warm-up still applies
+            return
+
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._queued_ids = track_ids
+        self._task = asyncio.ensure_future(self._warmAll(tracks))
+
+    async def _warmAll(self, tracks: List[dict]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._warm(track, semaphore) for track in tracks))
+
+    async def _warm(self, track: dict, semaphore: asyncio.Semaphore) -> None:
+        # Shaped like a playback snapshot so the usual selectors and getLyrics apply
+        playback = {'item': track}
+        async with semaphore:
+            try:
+                cover_url = select_cover_url(playback, self.controller.cover_size)
+                work = [self.controller.getLyrics(playback)]
+                if cover_url:
+                    # Display-sized decode, shared with the theme when it isn't cached yet
+                    work.append(self.controller.covers.fetch(cover_url, self.controller.cover_size))
+                    work.append(self.controller.get_theme(cover_url, select_album_id(playback)))
+                await asyncio.gather(*work)
+                self.warmed_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[bold red]Error prefetching {track.get('name')}: {e}[/bold red]")
@@ -0,0 +1,201 @@
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def search_key(text: str) -> str:
+    # Case, accents and punctuation folded away; unlike LyricsStore.normalize
+    # non-Latin scripts are kept, track and artist names are often in them
+    text = unicodedata.normalize('NFKD', (text or '').casefold())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    # Levenshtein distance counting a swap of neighbours as one edit, or
+    # limit + 1 as soon as it is certain to exceed `limit`
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SearchIndex:
+    # In-process name -> URI index over the synced library.
+    #
+    # Each kind (track, album, artist) keeps its entries once per URI, with
+    # a weight counting how often the name occurred (an artist with many
+    # saved tracks beats a one-off namesake). Lookups try the exact
+    # normalized name first, a dict hit, then rank candidates sharing
+    # trigrams with the query by Dice similarity and keep those within a
+    # typo or two of it. Answers are memoized until the kind is rebuilt;
+    # answers from the API fallback are kept as aliases of the query that
+    # found them, across rebuilds.
+
+    KINDS = ('track', 'album', 'artist')
+    # Below this a fuzzy match is more likely a different name than a typo:
+    # "hello" vs "hello world" scores 0.56, "bohemian rapsody" vs
+    # "bohemian rhapsody" 0.88
+    MIN_SCORE = 0.7
+    # Trigrams alone let extensions through ("love" vs "lover" scores 0.73),
+    # so a fuzzy match may also differ by at most one edit per this many
+    # characters: none for "love", two for "bohemian rapsody"
+    CHARS_PER_EDIT = 8
+
+    def __init__(self, memo_entries: int = 512):
+        self.memo_entries = memo_entries
+        self._entries: Dict[str, List[Dict]] = {kind: [] for kind in self.KINDS}
+        self._by_uri: Dict[str, Dict[str, int]] = {kind: {} for kind in self.KINDS}
+        self._exact: Dict[str, Dict[str, List[int]]] = {kind: {} for kind in self.KINDS}
+        self._grams: Dict[str, Dict[str, List[int]]] = {kind: {} for kind in self.KINDS}
+        self._aliases: Dict[str, Dict[str, Dict]] = {kind: {} for kind in self.KINDS}
+        self._memo: 'OrderedDict[tuple, Optional[Dict]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def count(self, kind: str) -> int:
+        return len(self._entries[kind])
+
+    # Building
+
+    def replace(self, kind: str, items: Iterable[Tuple[str, str]]) -> None:
+        """Rebuild one kind from (name, uri) pairs"""
+        self.install(kind, self.build(items))
+
+    def build(self, items: Iterable[Tuple[str, str]]) -> tuple:
+        """
+        Index (name, uri) pairs into new tables for install()
+
+        Touches nothing shared, so a large rebuild can run in a worker thread
+        while lookups keep using the current tables.
+        """
+        tables = ([], {}, {}, {})
+        for name, uri in items:
+            self._insert(tables, name, uri)
+        return tables
+
+    def install(self, kind: str, tables: tuple) -> None:
+        """Swap in the tables of one kind made by build()"""
+        self._entries[kind], self._by_uri[kind], self._exact[kind], self._grams[kind] = tables
+        self._forget(kind)
+
+    def add(self, kind: str, name: str, uri: str) -> None:
+        """Add one entry, e.g. an API search result, without a rebuild"""
+        self._add(kind, name, uri)
+        self._forget(kind)
+
+    def remember(self, kind: str, query: str, name: str, uri: str) -> None:
+        """Record what the API answered for `query`, so it is never asked twice"""
+        entry = self._add(kind, name, uri)
+        key = search_key(query)
+        if entry is not None and key:
+            self._aliases[kind][key] = entry
+        self._forget(kind)
+
+    def _add(self, kind: str, name: str, uri: str) -> Optional[Dict]:
+        tables = (self._entries[kind], self._by_uri[kind], self._exact[kind], self._grams[kind])
+        return self._insert(tables, name, uri)
+
+    @staticmethod
+    def _insert(tables: tuple, name: str, uri: str) -> Optional[Dict]:
+        entries, by_uri, exact, grams = tables
+        if not name or not uri:
+            return None
+        index = by_uri.get(uri)
+        if index is not None:
+            entry = entries[index]
+            entry['weight'] += 1
+            return entry
+        key = search_key(name)
+        if not key:
+            return None
+        index = len(entries)
+        key_grams = trigrams(key)
+        entries.append({'name': name, 'uri': uri, 'key': key, 'weight': 1, 'grams': len(key_grams)})
+        by_uri[uri] = index
+        exact.setdefault(key, []).append(index)
+        for gram in key_grams:
+            grams.setdefault(gram, []).append(index)
+        return entries[index]
+
+    def _forget(self, kind: str) -> None:
+        for memo_key in [memo_key for memo_key in self._memo if memo_key[0] == kind]:
+            del self._memo[memo_key]
+
+    # Lookups
+
+    def find(self, kind: str, query: str, fuzzy: bool = True) -> Optional[Dict]:
+        """
+        Best entry for `query`
+
+        Args:
+            kind: 'track', 'album' or 'artist'
+            query: name as typed
+            fuzzy: also accept near matches, not only the exact normalized name
+
+        Returns:
+            dict: {'name', 'uri', 'key', 'weight', 'grams'}, or None
+        """
+        memo_key = (kind, search_key(query), fuzzy)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key]
+
+        entries = self._entries[kind]
+        exact = self._exact[kind].get(memo_key[1])
+        if exact:
+            found = entries[max(exact, key=lambda index: entries[index]['weight'])]
+        elif memo_key[1] in self._aliases[kind]:
+            found = self._aliases[kind][memo_key[1]]
+        elif fuzzy:
+            ranked = self.search(kind, query, limit=1)
+            found = ranked[0][1] if ranked else None
+        else:
+            found = None
+
+        self._memo[memo_key] = found
+        while len(self._memo) > self.memo_entries:
+            self._memo.popitem(last=False)
+        return found
+
+    def search(self, kind: str, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        """Up to `limit` (score, entry) pairs close enough to be a typo of `query`, best first"""
+        key = search_key(query)
+        if not key:
+            return []
+        query_grams = trigrams(key)
+        grams = self._grams[kind]
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for index in grams.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+
+        entries = self._entries[kind]
+        size = len(query_grams)
+        max_edits = len(key) // self.CHARS_PER_EDIT
+        ranked = []
+        for index, common in shared.items():
+            entry = entries[index]
+            # Dice coefficient of the two trigram sets
+            score = 2 * common / (size + entry['grams'])
+            if score >= self.MIN_SCORE and edit_distance(key, entry['key'], max_edits) <= max_edits:
+                ranked.append((score, entry['weight'], index))
+        ranked.sort(reverse=True)
+        return [(score, entries[index]) for score, _, index in ranked[:limit]]
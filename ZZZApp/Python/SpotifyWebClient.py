@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from rich import print
+from spotipy import SpotifyException
+
+
+class AsyncSpotifyClient:
+    # Native asyncio client for the Spotify Web API.
+    #
+    # Mirrors the spotipy method names used by SpotifyController so calls read
+    # `await self.api.next_track(...)` instead of `self.spotify.next_track(...)`.
+    # Requests go through one pooled keep-alive aiohttp session, the access
+    # token is refreshed without blocking the event loop, and every endpoint
+    # family has its own timeout. Errors are raised as spotipy's
+    # SpotifyException so existing handlers (e.g. 429 Retry-After) keep working.
+    # Server errors and timeouts are retried for idempotent verbs only; a POST
+    # (skip, add to playlist) is retried only when the connection could not
+    # be opened, since it may have been applied before the error.
+
+    API_URL = 'https://api.spotify.com/v1/'
+    TOKEN_URL = 'https://accounts.spotify.com/api/token'
+
+    # Safe to send again when the outcome of the first attempt is unknown
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+
+    # Longest matching prefix wins, in seconds
+    DEFAULT_TIMEOUT = 10.0
+    ENDPOINT_TIMEOUTS = {
+        'me/player': 3.0,
+        'me/player/queue': 5.0,
+        'me/player/devices': 5.0,
+        'search': 5.0,
+        'me/tracks': 15.0,
+        'me/playlists': 15.0,
+        'playlists': 15.0,
+    }
+
+    def __init__(self, auth_manager, session: Optional[aiohttp.ClientSession] = None,
+                 pool_size: int = 10, keepalive_timeout: float = 60.0, retries: int = 2):
+        self.auth_manager = auth_manager
+        self.session = session
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.retries = retries
+        self._token_info: Optional[dict] = None
+        self._token_lock = asyncio.Lock()
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """Create (and adopt) a pooled keep-alive session for API and image requests"""
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def close(self) -> None:
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.create_session()
+        return self.session
+
+    # Authentication
+
+    async def _access_token(self, force_refresh: bool = False) -> str:
+        async with self._token_lock:
+            info = self._token_info
+            if info is None:
+                info = self.auth_manager.cache_handler.get_cached_token()
+            if info is None:
+                # First login is interactive, let spotipy drive it off the loop
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, lambda: self.auth_manager.get_access_token(as_dict=False))
+                info = self.auth_manager.cache_handler.get_cached_token()
+            elif force_refresh or self.auth_manager.is_token_expired(info):
+                info = await self._refresh_token(info)
+            self._token_info = info
+            return info['access_token']
+
+    async def _refresh_token(self, info: dict) -> dict:
+        credentials = f"{self.auth_manager.client_id}:{self.auth_manager.client_secret}"
+        headers = {'Authorization': 'Basic ' + base64.b64encode(credentials.encode()).decode()}
+        payload = {'grant_type': 'refresh_token', 'refresh_token': info['refresh_token']}
+        async with self._session().post(self.TOKEN_URL, data=payload, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=10)) as response:
+            if response.status != 200:
+                raise SpotifyException(response.status, -1, f"Token refresh failed: {await response.text()}")
+            new_info = await response.json()
+
+        # Spotify may omit the refresh token when it did not rotate it
+        new_info.setdefault('refresh_token', info['refresh_token'])
+        new_info['expires_at'] = int(time.time()) + new_info['expires_in']
+        self.auth_manager.cache_handler.save_token_to_cache(new_info)
+        return new_info
+
+    # Transport
+
+    def _timeout_for(self, endpoint: str) -> float:
+        best = ''
+        for prefix in self.ENDPOINT_TIMEOUTS:
+            if endpoint.startswith(prefix) and len(prefix) > len(best):
+                best = prefix
+        return self.ENDPOINT_TIMEOUTS.get(best, self.DEFAULT_TIMEOUT)
+
+    @staticmethod
+    def _clean_params(params: Optional[Dict]) -> Optional[Dict]:
+        # aiohttp only accepts str/int/float query values and we never send None
+        if not params:
+            return None
+        cleaned = {}
+        for key, value in params.items():
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            elif isinstance(value, (list, tuple)):
+                value = ','.join(value)
+            cleaned[key] = value
+        return cleaned
+
+    async def request(self, method: str, endpoint: str, params: Optional[Dict] = None,
+                      payload: Optional[Dict] = None, timeout: Optional[float] = None):
+        """
+        Perform an authenticated Web API request
+
+        Args:
+            method: HTTP verb
+            endpoint: path relative to /v1/, or a full URL (pagination links)
+            params: query parameters
+            payload: JSON body
+            timeout: override of the per-endpoint timeout, in seconds
+
+        Returns:
+            The decoded JSON response, or None for empty responses
+        """
+        if endpoint.startswith('http'):
+            url = endpoint
+            endpoint = endpoint[len(self.API_URL):] if endpoint.startswith(self.API_URL) else endpoint
+        else:
+            url = self.API_URL + endpoint
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self._timeout_for(endpoint))
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+
+        force_refresh = refreshed = False
+        for attempt in range(self.retries + 1):
+            headers = {'Authorization': f"Bearer {await self._access_token(force_refresh)}"}
+            refreshed, force_refresh = refreshed or force_refresh, False
+            try:
+                async with self._session().request(method, url, params=self._clean_params(params),
+                                                   json=payload, headers=headers,
+                                                   timeout=client_timeout) as response:
+                    if response.status == 401 and not refreshed:
+                        force_refresh = True
+                        continue
+                    if response.status >= 500 and idempotent and attempt < self.retries:
+                        await asyncio.sleep(0.3 * 2 ** attempt)
+                        continue
+                    if response.status >= 400:
+                        raise SpotifyException(
+                            response.status, -1, f"{url}: {await response.text()}",
+                            headers=dict(response.headers)
+                        )
+                    # Player commands answer 204 or an empty 200
+                    body = await response.read()
+                    return json.loads(body) if body else None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Failing to connect means nothing was sent
+                unsent = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt >= self.retries or not (idempotent or unsent):
+                    raise SpotifyException(599, -1, f"{url}: {e!r}")
+                await asyncio.sleep(0.3 * 2 ** attempt)
+        raise SpotifyException(401, -1, f"{url}: unauthorized after token refresh")
+
+    async def get_bytes(self, url: str, timeout: float = DEFAULT_TIMEOUT) -> bytes:
+        """Download a non-API resource (cover art) over the shared pool"""
+        async with self._session().get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def get_json(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                       timeout: float = DEFAULT_TIMEOUT):
+        """GET a third-party JSON resource (e.g. lyrics) over the shared pool, None on 404"""
+        async with self._session().get(url, params=self._clean_params(params), headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return await response.json()
+
+    # Endpoints, named after their spotipy counterparts
+
+    async def next(self, result: Dict) -> Optional[Dict]:
+        if result.get('next'):
+            return await self.request('GET', result['next'])
+        return None
+
+    async def me(self) -> Dict:
+        return await self.request('GET', 'me')
+
+    async def current_playback(self, market: Optional[str] = None) -> Optional[Dict]:
+        return await self.request('GET', 'me/player', {'market': market})
+
+    async def current_user_playing_track(self) -> Optional[Dict]:
+        return await self.request('GET', 'me/player/currently-playing')
+
+    async def queue(self) -> Optional[Dict]:
+        return await self.request('GET', 'me/player/queue')
+
+    async def devices(self) -> Dict:
+        return await self.request('GET', 'me/player/devices')
+
+    async def start_playback(self, device_id: Optional[str] = None, context_uri: Optional[str] = None,
+                             uris: Optional[List[str]] = None, offset: Optional[Dict] = None,
+                             position_ms: Optional[int] = None) -> None:
+        payload = {}
+        if context_uri is not None:
+            payload['context_uri'] = context_uri
+        if uris is not None:
+            payload['uris'] = uris
+        if offset is not None:
+            payload['offset'] = offset
+        if position_ms is not None:
+            payload['position_ms'] = position_ms
+        await self.request('PUT', 'me/player/play', {'device_id': device_id}, payload or None)
+
+    async def pause_playback(self, device_id: Optional[str] = None) -> None:
+        await self.request('PUT', 'me/player/pause', {'device_id': device_id})
+
+    async def next_track(self, device_id: Optional[str] = None) -> None:
+        await self.request('POST', 'me/player/next', {'device_id': device_id})
+
+    async def previous_track(self, device_id: Optional[str] = None) -> None:
+        await self.request('POST', 'me/player/previous', {'device_id': device_id})
+
+    async def seek_track(self, position_ms: int, device_id: Optional[str] = None) -> None:
+        await self.request('PUT', 'me/player/seek', {'position_ms': position_ms, 'device_id': device_id})
+
+    async def shuffle(self, state: bool, device_id: Optional[str] = None) -> None:
+        await self.request('PUT', 'me/player/shuffle', {'state': state, 'device_id': device_id})
+
+    async def repeat(self, state: str, device_id: Optional[str] = None) -> None:
+        await self.request('PUT', 'me/player/repeat', {'state': state, 'device_id': device_id})
+
+    async def volume(self, volume_percent: int, device_id: Optional[str] = None) -> None:
+        await self.request('PUT', 'me/player/volume', {'volume_percent': volume_percent, 'device_id': device_id})
+
+    async def search(self, q: str, limit: int = 10, offset: int = 0, type: str = 'track',
+                     market: Optional[str] = None) -> Dict:
+        return await self.request('GET', 'search', {
+            'q': q, 'limit': limit, 'offset': offset, 'type': type, 'market': market
+        })
+
+    async def current_user_playlists(self, limit: int = 50, offset: int = 0) -> Dict:
+        return await self.request('GET', 'me/playlists', {'limit': limit, 'offset': offset})
+
+    async def current_user_saved_tracks(self, limit: int = 20, offset: int = 0,
+                                        market: Optional[str] = None) -> Dict:
+        return await self.request('GET', 'me/tracks', {'limit': limit, 'offset': offset, 'market': market})
+
+    async def current_user_saved_tracks_add(self, tracks: List[str]) -> None:
+        # Up to 50 IDs or URIs
+        ids = [track.rsplit(':', 1)[-1] for track in tracks]
+        await self.request('PUT', 'me/tracks', {'ids': ids})
+
+    async def playlist_items(self, playlist_id: str, fields: Optional[str] = None, limit: int = 100,
+                             offset: int = 0, market: Optional[str] = None) -> Dict:
+        return await self.request('GET', f'playlists/{playlist_id}/tracks', {
+            'fields': fields, 'limit': limit, 'offset': offset, 'market': market
+        })
+
+    async def playlist_add_items(self, playlist_id: str, items: List[str],
+                                 position: Optional[int] = None) -> Dict:
+        payload = {'uris': items}
+        if position is not None:
+            payload['position'] = position
+        return await self.request('POST', f'playlists/{playlist_id}/tracks', payload=payload)
+
+    async def user_playlist_add_tracks(self, user: str, playlist_id: str, tracks: List[str],
+                                       position: Optional[int] = None) -> Dict:
+        # Kept for parity with spotipy, the user is implied by the token
+        return await self.playlist_add_items(playlist_id, tracks, position)
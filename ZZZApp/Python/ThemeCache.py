@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from PySide6.QtCore import QStandardPaths
+from rich import print
+
+
+def theme_key(album_id: Optional[str] = None, cover_url: Optional[str] = None) -> Optional[str]:
+    """Album ID when known, so every track of an album shares one theme, else the cover URL"""
+    if album_id:
+        return f"album:{album_id}"
+    if cover_url:
+        return f"cover:{cover_url}"
+    return None
+
+
+class ThemeCache:
+    # Memoized per-album themes (average/bright colours, palette, ...).
+    #
+    # A theme is derived once from the cover and then reused for every track
+    # of the album, so consecutive tracks cost no image work at all. Entries
+    # live in a bounded LRU in memory and are mirrored to a small JSON file
+    # next to the cover cache, written atomically, so they survive restarts.
+    # The file is rewritten at most once per `save_delay` seconds, in the
+    # executor; close() writes whatever is still unsaved.
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 512, save_delay: float = 5.0):
+        if path is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            path = Path(base or Path.home() / '.cache' / 'ZZZApp') / 'themes.json'
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        # Only one writer of the temp file at a time
+        self._save_lock = threading.Lock()
+        self._themes: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._dirty = False
+        self._timer: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[bold red]Ignoring unreadable theme cache {self.path}: {e}[/bold red]")
+            return
+        # Stored least recently used first
+        for key, theme in stored:
+            self._themes[key] = theme
+        self._trim()
+
+    def _save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            items = list(self._themes.items())
+            self._dirty = False
+        with self._save_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp = self.path.with_name(self.path.name + '.tmp')
+                with open(temp, 'w', encoding='utf-8') as f:
+                    json.dump(items, f)
+                os.replace(temp, self.path)
+            except OSError as e:
+                print(f"[bold red]Error saving theme cache: {e}[/bold red]")
+
+    def _scheduleSave(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on the event loop, nothing to batch with
+            self._save()
+            return
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._saveLater())
+
+    async def _saveLater(self) -> None:
+        await asyncio.sleep(self.save_delay)
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._save)
+
+    def close(self) -> None:
+        """Write unsaved themes now, e.g. at shutdown"""
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        self._save()
+
+    def _trim(self) -> None:
+        while len(self._themes) > self.max_entries:
+            self._themes.popitem(last=False)
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        """Cached theme for `key`, marking it as recently used, or None on a miss"""
+        if key is None:
+            return None
+        with self._lock:
+            theme = self._themes.get(key)
+            if theme is None:
+                self.misses += 1
+                return None
+            self._themes.move_to_end(key)
+            self.hits += 1
+            return theme
+
+    def put(self, key: Optional[str], theme: Dict) -> None:
+        """Store a theme, persisted with the next batched save"""
+        if key is None or not theme:
+            return
+        with self._lock:
+            self._themes[key] = theme
+            self._themes.move_to_end(key)
+            self._trim()
+            self._dirty = True
+        self._scheduleSave()
+
+    def __len__(self) -> int:
+        return len(self._themes)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from rich import print
+
+from PlaybackStore import select_track_id
+
+
+class TrackChangePipeline:
+    # Runs the per-track work (cover, colour, lyrics, ...) when the track changes.
+    #
+    # Every stage starts at once and is awaited together with asyncio.gather,
+    # but each one publishes its result the moment it finishes, so a fast
+    # stage never waits for a slow one. Starting the pipeline for a newer
+    # track cancels whatever is still running for the previous one, and a
+    # stage result that arrives for a stale track is dropped.
+
+    def __init__(self):
+        self._stages: Dict[str, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.track_id: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    def add_stage(self, name: str, work: Callable[[dict], Awaitable[Any]],
+                  publish: Callable[[Any], None]) -> None:
+        """
+        Register a stage
+
+        Args:
+            name: stage name, used for timings and error messages
+            work: coroutine function taking the new playback snapshot
+            publish: called on the Qt/asyncio thread with the stage result
+        """
+        self._stages[name] = (work, publish)
+
+    def start(self, playback: Optional[dict]) -> Optional[asyncio.Task]:
+        """Cancel in-flight work and run every stage for the track in `playback`"""
+        self.cancel()
+        self.track_id = select_track_id(playback)
+        if self.track_id is None:
+            return None
+        self._task = asyncio.ensure_future(self._run(self.track_id, playback))
+        return self._task
+
+    def cancel(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self, track_id: str, playback: dict) -> None:
+        started = time.monotonic()
+        await asyncio.gather(*(
+            self._runStage(track_id, name, work, publish, playback)
+            for name, (work, publish) in self._stages.items()
+        ))
+        self.timings['total'] = time.monotonic() - started
+
+    async def _runStage(self, track_id: str, name: str, work: Callable, publish: Callable,
+                        playback: dict) -> None:
+        started = time.monotonic()
+        try:
+            result = await work(playback)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[bold red]Track pipeline stage '{name}' failed: {e}[/bold red]")
+            return
+
+        if track_id != self.track_id:
+            return
+        try:
+            publish(result)
+        except Exception as e:
+            print(f"[bold red]Error publishing '{name}' result: {e}[/bold red]")
+        self.timings[name] = time.monotonic() - started
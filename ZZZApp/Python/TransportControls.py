@@ -0,0 +1,101 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from rich import print
+from spotipy import SpotifyException
+
+from PlaybackStore import PlaybackStore, select_track_id
+
+
+def _already_applied(e: Exception) -> bool:
+    # Pausing a paused player (or resuming a playing one) is refused as a
+    # restriction, but leaves the player exactly where we wanted it
+    return (isinstance(e, SpotifyException) and e.http_status == 403
+            and 'Restriction violated' in str(e))
+
+
+class TransportControls:
+    # Play/pause, next and previous that show on screen in the same frame.
+    #
+    # Each command first patches the shared PlaybackStore with the state it
+    # should produce (play state, progress reset, and the next or previous
+    # track when it is known) and only then calls the API in the background.
+    # The store reconciles that guess with the snapshots that follow: a
+    # failed call restores the previous state at once, and a re-fetch shortly
+    # after success has the final say: it confirms the guess or replaces it.
+
+    # Like the Spotify clients: "previous" restarts the track once it has
+    # played this long
+    RESTART_THRESHOLD_MS = 3000
+
+    def __init__(self, controller, next_item: Callable[[], Optional[Dict]] = lambda: None,
+                 reconcile_delay: float = 0.4, history: int = 20):
+        self.controller = controller
+        self.store: PlaybackStore = controller.playback_store
+        # Where the upcoming track comes from, e.g. the queue prefetcher
+        self.next_item = next_item
+        # Give the player this long to apply a command before re-reading it
+        self.reconcile_delay = reconcile_delay
+        # Tracks played before the current one, to guess what "previous" plays
+        self._history = deque(maxlen=history)
+        self.store.subscribe('transport-history', self._onTrackChanged, select_track_id)
+
+    def _onTrackChanged(self, playback: Optional[dict]) -> None:
+        if playback and playback.get('item') and select_track_id(playback):
+            self._history.append(playback['item'])
+
+    # Commands
+
+    def toggle(self) -> Optional[asyncio.Future]:
+        """Pause when playing, resume when paused"""
+        playback = self.store.snapshot
+        if not playback:
+            return None
+        api, device_id = self.controller.api, self.controller.default_device_id
+        if playback.get('is_playing'):
+            return self._run(api.pause_playback(device_id=device_id), 'pausing playback', is_playing=False)
+        return self._run(api.start_playback(device_id=device_id), 'resuming playback', is_playing=True)
+
+    def next(self) -> Optional[asyncio.Future]:
+        """Skip to the next track"""
+        fields = {'progress_ms': 0}
+        upcoming = self.next_item()
+        if upcoming:
+            fields.update(item=upcoming, is_playing=True)
+        api = self.controller.api
+        return self._run(api.next_track(device_id=self.controller.default_device_id),
+                         'skipping to next song', **fields)
+
+    def previous(self) -> Optional[asyncio.Future]:
+        """Restart the track, or go back to the previous one near its start"""
+        api, device_id = self.controller.api, self.controller.default_device_id
+        if self.store.clock.position() > self.RESTART_THRESHOLD_MS:
+            return self._run(api.seek_track(0, device_id=device_id), 'restarting song', progress_ms=0)
+
+        fields = {'progress_ms': 0}
+        if len(self._history) >= 2:
+            # The current track and the one before it; the latter is re-added
+            # when the optimistic snapshot is published
+            self._history.pop()
+            fields.update(item=self._history.pop(), is_playing=True)
+        return self._run(api.previous_track(device_id=device_id), 'going back to previous song', **fields)
+
+    def _run(self, command: Awaitable, description: str, **fields) -> asyncio.Future:
+        token = self.store.optimistic(**fields)
+
+        async def send() -> None:
+            try:
+                await command
+            except Exception as e:
+                if not _already_applied(e):
+                    print(f"[bold red]Error {description}: {e}[/bold red]")
+                    # Put the previous state back now, then fetch the real one
+                    self.store.settle(token, False)
+                    await self.store.refresh()
+                    return
+            self.store.settle(token, True)
+            await asyncio.sleep(self.reconcile_delay)
+            await self.store.verify(token)
+
+        return asyncio.ensure_future(send())
@@ -0,0 +1,122 @@
+"""
+Micro-benchmark: LrcParser.parse_lrc against the original find()-based parser
+
+Run from ZZZApp/Python:
+
+    python benchmarks/bench_lrc_parser.py [--songs 2000] [--repeat 5]
+
+Three synthetic corpora of songs with 40-90 lines and metadata tags:
+"plain" has one timestamp per line like most LRCLib lyrics, "synced" adds
+an offset tag and multi-timestamp chorus lines, "mixed" also enhanced word
+timings. The legacy parser mangles or drops the latter two, so it does
+less work on them than LrcParser.
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from LrcParser import parse_lrc  # noqa: E402
+
+
+def legacy_parse(synced_lyrics):
+    # The parser formerly inlined in SpotifyController._get_lrclib_lyrics
+    parsed_lyrics = []
+    for line in synced_lyrics.split('\n'):
+        if line.strip() and '[' in line:
+            try:
+                time_str = line[line.find('[')+1:line.find(']')]
+                text = line[line.find(']')+1:].strip()
+                mins, secs = time_str.split(':')
+                time_ms = (int(mins) * 60 + float(secs)) * 1000
+                parsed_lyrics.append({'time': int(time_ms), 'words': text})
+            except Exception:
+                continue
+    return parsed_lyrics
+
+
+def stamp(ms, brackets='[]'):
+    return f"{brackets[0]}{ms // 60000:02d}:{ms // 1000 % 60:02d}.{ms % 1000 // 10:02d}{brackets[1]}"
+
+
+def make_song(rng, kind='mixed'):
+    words = ['love', 'night', 'city', 'light', 'heart', 'run', 'fire', 'away', 'home', 'dream']
+    lines = ['[ar:Artist]', '[ti:Title]', '[al:Album]', '[by:bench]']
+    if kind != 'plain':
+        lines.append(f'[offset:{rng.randint(-300, 300)}]')
+    position = rng.randint(0, 15000)
+    for _ in range(rng.randint(40, 90)):
+        text = [rng.choice(words) for _ in range(rng.randint(3, 9))]
+        roll = rng.random() if kind != 'plain' else 1.0
+        if roll < 0.1:
+            # Chorus written once with two timestamps
+            lines.append(stamp(position) + stamp(position + 60000) + ' '.join(text))
+        elif roll < 0.3 and kind == 'mixed':
+            timed, t = [], position
+            for word in text:
+                timed.append(stamp(t, '<>') + word + ' ')
+                t += rng.randint(150, 600)
+            lines.append(stamp(position) + ''.join(timed))
+        else:
+            lines.append(stamp(position) + ' '.join(text))
+        position += rng.randint(1500, 5000)
+    return '\n'.join(lines)
+
+
+def bench(parsers, corpus, repeat):
+    # Rounds alternate between the parsers, so a machine that speeds up or
+    # slows down during the run affects all of them alike
+    best = {name: float('inf') for name in parsers}
+    for _ in range(repeat):
+        for name, parse in parsers.items():
+            started = time.perf_counter()
+            for song in corpus:
+                parse(song)
+            best[name] = min(best[name], time.perf_counter() - started)
+    lines = sum(song.count('\n') + 1 for song in corpus)
+    for name, seconds in best.items():
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms total, {seconds / lines * 1e6:6.2f} us/line")
+    return best
+
+
+def retained(parse, corpus):
+    # Memory held by the parsed results of the whole corpus
+    tracemalloc.start()
+    results = [parse(song) for song in corpus]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for kind in ('plain', 'synced', 'mixed'):
+        rng = random.Random(args.seed)
+        corpus = [make_song(rng, kind) for _ in range(args.songs)]
+        size = sum(len(song) for song in corpus) / 1e6
+        print(f"{kind}: {args.songs} songs, {size:.1f} MB of LRC, best of {args.repeat}")
+
+        best = bench({'legacy': legacy_parse, 'LrcParser': parse_lrc}, corpus, args.repeat)
+        print(f"{'speedup':>8}: {best['legacy'] / best['LrcParser']:.2f}x")
+        print(f"{'memory':>8}: legacy {retained(legacy_parse, corpus) / 1e6:.1f} MB, "
+              f"LrcParser {retained(parse_lrc, corpus) / 1e6:.1f} MB")
+
+        # What the legacy parser gets wrong on the same corpus
+        legacy_lines = sum(len(legacy_parse(song)) for song in corpus)
+        parsed = [parse_lrc(song) for song in corpus]
+        print(f"{'lines':>8}: legacy {legacy_lines}, LrcParser {sum(len(p) for p in parsed)}"
+              f" (+{sum(len(p.word_times) for p in parsed)} word timings)\n")
+
+
+if __name__ == '__main__':
+    main()
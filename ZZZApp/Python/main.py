@@ -4,8 +4,8 @@ from pathlib import Path
 import dotenv
 import socket
 
-from PySide6.QtCore import QObject, Slot, Property, Signal, QTimer, QThread, QEvent
-from PySide6.QtGui import QGuiApplication, QColor
+from PySide6.QtCore import QObject, Slot, Property, Signal, QTimer, QThread, QEvent, Qt
+from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine
 
 from autogen.settings import url, import_paths
@@ -24,7 +24,13 @@ from PySide6.QtAsyncio import QAsyncioEventLoopPolicy
 import aiohttp
 
 from methods import *
-from UtilityMethods import *
+from PlaybackStore import *
+from PlaybackEvents import *
+from LyricsTimeline import LyricsTimeline
+from TrackPipeline import TrackChangePipeline
+from QueuePrefetcher import QueuePrefetcher
+from TransportControls import TransportControls
+from CoverImages import CoverImageProvider
 
 import tracemalloc
 tracemalloc.start()
@@ -76,6 +82,9 @@ sp = spotipy.Spotify(
 
 sp_controller = SpotifyController(sp)
 
+# Logical size of the cover in Screen01.ui.qml
+COVER_SIZE = 235
+
 class WindowEventFilter(QObject):
     def __init__(self, information_binding):
         super().__init__()
@@ -90,8 +99,8 @@ class WindowEventFilter(QObject):
             if not hasattr(self._information_binding, '_is_moving'):
                 self._information_binding._is_moving = True
                 # Pause updates during movement
-                if hasattr(self._information_binding, '_lyricTimer'):
-                    self._information_binding._lyricTimer.stop()
+                if hasattr(self._information_binding, 'lyricsTimer'):
+                    self._information_binding.lyricsTimer.stop()
                 if hasattr(self._information_binding, 'progressTimer'):
                     self._information_binding.progressTimer.stop()
             
@@ -104,131 +113,46 @@ class WindowEventFilter(QObject):
         # Movement has stopped
         self._information_binding._is_moving = False
         # Resume updates
-        if hasattr(self._information_binding, '_lyricTimer'):
-            self._information_binding._lyricTimer.start()
+        if hasattr(self._information_binding, 'lyricsTimer'):
+            self._information_binding._scheduleNextLyric()
         if hasattr(self._information_binding, 'progressTimer'):
             self._information_binding.progressTimer.start()
 
 
 class SpotifyEventListener():
-    def __init__(self, spotify, callback: Callable, interval: float = 1.0):
+    # Runs a PlaybackEventSource, which keeps the shared playback store up
+    # to date, and forwards track and play/pause changes to `callback` as raw
+    # playback snapshots. Consumers subscribed to the store need no callback.
+    # `spotify` is the SpotifyController owning the store; without a source
+    # the Web API is polled adaptively, never more often than every
+    # `interval` seconds.
+    def __init__(self, spotify, callback: Optional[Callable] = None, interval: float = 1.0,
+                 source: Optional[PlaybackEventSource] = None):
         super().__init__()
         self.spotify = spotify
         self.callback = callback
         self.interval = interval
         self.last_playback_state: Optional[dict] = None
-        self._running = True
-        self._task = None
+        self.source = source or PollingEventSource(spotify.playback_store, interval)
+        self.source.connect(self._on_event)
 
     async def start(self):
-        self._task = asyncio.create_task(self.run())
+        if await self.source.start() or isinstance(self.source, PollingEventSource):
+            return
+        # Local backend unavailable, fall back to the Web API
+        print(f"Playback source '{self.source.name}' unavailable, polling instead")
+        self.source = PollingEventSource(self.spotify.playback_store, self.interval)
+        self.source.connect(self._on_event)
+        await self.source.start()
 
     async def stop(self):
-        self._running = False
-        if self._task:
-            await self._task
-
-    async def run(self):
-        while self._running:
-            try:
-                current_song = await self.spotify.getCurrentSongInfo()
-                
-                if current_song != self.last_playback_state:
-                    if self._has_relevant_changes(current_song):
-                        await self.callback(current_song)
-                    self.last_playback_state = current_song
-
-            except Exception as e:
-                print(f"Error in event listener: {e}")            
-            await asyncio.sleep(self.interval)
-
-
-
-
-    async def _has_relevant_changes(self, current_playback: Optional[dict]) -> bool:
-        if not current_playback or not self.last_playback_state:
-            return True
-
-        # Check for track change
-        current_track = current_playback.get('item', {}).get('id')
-        last_track = self.last_playback_state.get('item', {}).get('id')
-        if current_track != last_track:
-            return True
-
-        # Check for playback state change (playing/paused)
-        current_playing = current_playback.get('is_playing')
-        last_playing = self.last_playback_state.get('is_playing')
-        if current_playing != last_playing:
-            return True
+        await self.source.stop()
 
-        return False
-
-    def stop(self):
-        self._running = False
-
-
-class ImageProcessor(QThread):
-    finished = Signal(str, str)
-    
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
-        self._spotifyController = sp_controller
-        self._image_processor = None
-        
-
-        
-    async def run(self):
-        # Update the cover image URL from Spotify
-        try:
-            new_url = await self._spotifyController.getCoverImage()
-            # Only process if the original URL changed
-            if new_url != self.url:
-                rounded_url = await self._processAndRoundImage(new_url)
-                self.finished.emit(rounded_url, new_url)                    
-        except Exception as e:
-            print(f"Error updating cover: {e}") 
-            
-    async def process_image(self, url):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.read()
-                        # Process image data
-                        rounded_url = await self._process_and_round_image(data)
-                        self.finished.emit(rounded_url, url)
-        except Exception as e:
-            print(f"Error processing image: {e}")
-
-
-    def _processAndRoundImage(self, url):
-        if not url:    
-            default_image_path = os.path.abspath("default_cover.png")
-            print(f"Using default image: {default_image_path}")
-            return ""
-        try:
-            print("Starting image processing...")
-            output_path = os.path.abspath(f"rounded_cover_{hash(url)}.png")
-            
-            if url.startswith('file:///'):
-                print(f"Already a file URL, skipping: {url}")
-                return url
-                
-            print(f"Processing URL: {url}")
-            rounded_url = utilityMethods.create_rounded_image_from_url(url, output_path)  
-            
-            if rounded_url is None:
-                print(f"Failed to process image, falling back to original URL: {url}")
-                return url
-                
-            file_url = QUrl.fromLocalFile(rounded_url).toString()
-            print(f"Final file URL: {file_url}")
-            return file_url
-            
-        except Exception as e:
-            print(f"Error in _process_and_round_image: {e}")
-            return url
+    async def _on_event(self, event: dict):
+        # Seeks reach the lyrics through the playback store subscriptions
+        if self.callback and event['type'] in (TRACK_CHANGED, PLAY_STATE_CHANGED):
+            await self.callback(event['playback'])
+        self.last_playback_state = event['playback']
 
 
 class InformationBinding(QObject):
@@ -239,6 +163,7 @@ class InformationBinding(QObject):
     songPercentChanged = Signal()   
     songColorAvgChanged = Signal()
     songColorBrightChanged = Signal()
+    songPaletteChanged = Signal()
     songTitleChanged = Signal()
     songArtistChanged = Signal()
     releaseYearChanged = Signal()
@@ -247,6 +172,10 @@ class InformationBinding(QObject):
     currentLyricChanged = Signal()
     nextLyricChanged = Signal()
     previousLyricChanged = Signal()
+    currentLyricWordsChanged = Signal()
+    currentWordIndexChanged = Signal()
+    lineProgressChanged = Signal()
+    isPlayingChanged = Signal()
     
     windowLoaded = Signal()
 
@@ -267,9 +196,53 @@ class InformationBinding(QObject):
         self._songPercent = 0
         self._songColorAvg = "#000000"
         self._songColorBright = "#000000"
+        self._songPalette = {}
         self._original_url = None
         self._songTitle = ""
         self._songArtist = ""
+        self._releaseYear = ""
+        self._current_track_id = None
+        self._update_throttle = {}
+        self._lyrics = []
+        self._timeline = LyricsTimeline()
+        self._lyricIndex = None
+        self._currentTime = 0
+        self._previousLyric = ""
+        self._currentLyric = ""
+        self._nextLyric = ""
+        # Karaoke state of the current line, updated every frame
+        self._isPlaying = False
+        self._currentLyricWords = []
+        self._currentWordIndex = -1
+        self._lineProgress = 0.0
+
+        # Pick and decode cover variants for the on-screen size in device pixels
+        self._spotifyController.cover_size = int(COVER_SIZE * app.devicePixelRatio())
+
+        # Cover, palette and lyrics are fetched concurrently on each track change
+        self._trackPipeline = TrackChangePipeline()
+        self._trackPipeline.add_stage('cover', self._fetchCover, self._publishCover)
+        self._trackPipeline.add_stage('theme', self._fetchCoverTheme, self._publishCoverTheme)
+        self._trackPipeline.add_stage('lyrics', self._spotifyController.getLyrics, self._applyLyrics)
+
+        # Warms the same caches for the next tracks in the queue
+        self._prefetcher = QueuePrefetcher(self._spotifyController)
+
+        # Transport buttons patch the store first and call the API after
+        self._transport = TransportControls(self._spotifyController, self._prefetcher.take_next)
+
+        # Lyric timing follows the shared playback snapshot
+        self._spotifyController.playback_store.subscribe(
+            'lyrics', self._onPlaybackTimingChanged, select_timing
+        )
+        # Song info and play state straight from the store, so optimistic
+        # changes and their rollbacks show up without waiting for an event
+        self._spotifyController.playback_store.subscribe(
+            'song-info', self._handle_playback_event, select_track_id
+        )
+        self._spotifyController.playback_store.subscribe(
+            'play-state', self._onPlayStateChanged, select_is_playing
+        )
         
         # Schedule async initialization
         asyncio.create_task(self._async_init())
@@ -279,18 +252,8 @@ class InformationBinding(QObject):
     async def _async_init(self):
         """Async initialization method"""
         try:
-            # Get initial values asynchronously
-            original_url = await self._spotifyController.getCoverImage()
-            self._songUrl = self._processAndRoundImage(original_url)
-            self._songPercent = await self._spotifyController.getPlaybackProgressPercentage()
-            self._songColorAvg = await self._spotifyController.get_average_hex_color(original_url)
-            
-            # Emit signals for initial values
-            self.songUrlChanged.emit()
-            self.songPercentChanged.emit()
-            self.songColorAvgChanged.emit()
-            
-            # Start event listener
+            # Song info, cover, palette and lyrics follow the store's
+            # 'song-info' subscription through the track pipeline
             await self.start_event_listener()
             
         except Exception as e:
@@ -305,8 +268,8 @@ class InformationBinding(QObject):
         """Call this when window starts moving"""
         self._is_moving = True
         # Pause non-essential updates
-        if hasattr(self, '_lyricTimer'):
-            self._lyricTimer.stop()
+        if hasattr(self, 'lyricsTimer'):
+            self.lyricsTimer.stop()
         
     async def moveStopped(self):
         """Call this when window stops moving"""
@@ -316,8 +279,8 @@ class InformationBinding(QObject):
     async def _onMoveFinished(self):
         self._is_moving = False
         # Resume updates
-        if hasattr(self, '_lyricTimer'):
-            await self._lyricTimer.start()
+        if hasattr(self, 'lyricsTimer'):
+            self._scheduleNextLyric()
             
     async def _throttle(self, key, interval):
         """Helper to throttle frequent updates"""
@@ -329,11 +292,16 @@ class InformationBinding(QObject):
         return False
     
     async def start_event_listener(self):
+        # Only keeps the store fresh: track changes reach
+        # _handle_playback_event through the 'song-info' subscription
+        store = self._spotifyController.playback_store
         self._event_listener = SpotifyEventListener(
-            self._spotifyController.spotify,
-            self._handle_playback_event
+            self._spotifyController,
+            source=create_event_source(store, os.getenv("PLAYBACK_SOURCE"))
         )
         await self._event_listener.start()
+        # The store was seeded before we subscribed, show that track now
+        await self._handle_playback_event(store.snapshot)
     
     async def _handle_playback_event(self, playback_state):
         """Handle playback state changes"""
@@ -361,14 +329,12 @@ class InformationBinding(QObject):
                 self.releaseYear = self.releaseYear.split('-')[0] if self.releaseYear else ''
                 print(self.releaseYear)
 
-                # Update cover
-                await   self._updateCover()
-                
-                # Load new lyrics
-                await self.loadLyrics()
+                # Cover, palette and lyrics, concurrently; cancels the previous track's work
+                self._trackPipeline.start(playback_state)
+                self._prefetcher.schedule()
 
             # Update playback progress
-            await self._update_progress()
+            self._update_progress()
 
         except Exception as e:
             print(f"Error handling playback event: {e}")
@@ -378,19 +344,15 @@ class InformationBinding(QObject):
         # Setup and start update timers
         self._setupProgressTimer()
         self._setupLyricsTimer()
-        
-
-        # Create image processor
-        self._imageProcessor = ImageProcessor(self._spotifyController)
-        self._imageProcessor.finished.connect(self._onCoverProcessed)
 
     def _setupProgressTimer(self) -> None:
         # Setup timer for progress updates
         self._progressThread = QThread()
         # Thread New
 
+        # Reads the local playback clock only, so it can run at frame rate
         self.progressTimer = QTimer(self)
-        self.progressTimer.setInterval(500)  # Update every 50ms
+        self.progressTimer.setInterval(16)  # Update every frame (~60fps)
         self.progressTimer.timeout.connect(self._update_progress)
         self.progressTimer.start()
 
@@ -402,65 +364,73 @@ class InformationBinding(QObject):
         self._lyricsThread = QThread()
         # Thread New
         
+        # Single shot, armed for the start of the next line by _scheduleNextLyric
         self.lyricsTimer = QTimer(self)
-        self.lyricsTimer.setInterval(500)  # Update every second
-        self.lyricsTimer.timeout.connect(self.updateLyricDisplay)
-        self.lyricsTimer.start()
+        self.lyricsTimer.setSingleShot(True)
+        self.lyricsTimer.setTimerType(Qt.PreciseTimer)
+        self.lyricsTimer.timeout.connect(self._onLyricTimeout)
         
-        self._lyricsThread.started.connect(self.lyricsTimer.start)
         self._lyricsThread.finished.connect(self.lyricsTimer.stop)
 
-    
-    def _processAndRoundImage(self, url):
-        if not url:    
-            default_image_path = os.path.abspath("default_cover.png")
-            return ""
-        try:
-            output_path = os.path.abspath(f"rounded_cover_{hash(url)}.png")
-            
-            if url.startswith('file:///'):
-                return url
-                
-            rounded_url = utilityMethods.create_rounded_image_from_url(url, output_path)  
-            
-            if rounded_url is None:
-                return url
-                
-            file_url = QUrl.fromLocalFile(rounded_url).toString()
-            return file_url
-            
-        except Exception as e:
-            print(f"Error in _process_and_round_image: {e}")
-            return url
-    
-    def _onCoverProcessed(self, processed_url, original_url):
-        try:
-            self.songUrl = processed_url
-            self._original_url = original_url
-            
-            # Update color using original URL
-            if self._spotifyController.get_average_hex_color(original_url) != '':
-                self._songColorAvg = self._spotifyController.get_average_hex_color(original_url)
-                self.songColorAvgChanged.emit()
-                self.songColorBrightChanged.emit()
-        except Exception as e:
-            print(f"Error updating cover: {e}")
+    def _scheduleNextLyric(self) -> None:
+        # Arm the lyrics timer for the exact start of the next line. Nothing is
+        # armed while paused, moving or past the last line, so there are no
+        # wakeups until the playback state changes again.
+        self.lyricsTimer.stop()
+        clock = self._spotifyController.playback_store.clock
+        if self._is_moving or not self._timeline or not clock.is_playing:
+            return
+
+        current_index = self._lyricIndex if self._lyricIndex is not None else -1
+        next_time = self._timeline.next_time(current_index)
+        if next_time is None:
+            return
+        self.lyricsTimer.start(max(1, next_time - clock.position()))
+
+    @Slot()
+    def _onLyricTimeout(self) -> None:
+        self.updateLyricDisplay()
+        self._scheduleNextLyric()
+
+    def _onPlaybackTimingChanged(self, playback: Optional[dict]) -> None:
+        # Seek, pause/resume or track change: the clock has been re-synced,
+        # so show the right line now and re-arm for the next one
+        self.updateLyricDisplay()
+        self._scheduleNextLyric()
+
+
+    # Track pipeline stages
+    async def _fetchCover(self, playback: dict) -> Optional[tuple]:
+        original_url = select_cover_url(playback, self._spotifyController.cover_size)
+        if not original_url or original_url == self._original_url:
+            return None
+        # No rendering: QML rounds the corners of the in-memory cover
+        source = await self._spotifyController.get_cover_source(original_url)
+        return source or original_url, original_url
+
+    def _publishCover(self, result: Optional[tuple]) -> None:
+        if result:
+            self.songUrl, self._original_url = result
+
+    async def _fetchCoverTheme(self, playback: dict) -> Optional[dict]:
+        original_url = select_cover_url(playback, self._spotifyController.cover_size)
+        if not original_url:
+            return None
+        # Memoized per album, the next track of the same album needs no image work
+        return await self._spotifyController.get_theme(original_url, select_album_id(playback))
+
+    def _publishCoverTheme(self, theme: Optional[dict]) -> None:
+        if not theme:
+            return
+        self.songColorAvg = theme['avg']
+        self.songColorBright = theme['bright']
+        self.songPalette = theme['palette']
 
     # Spotify Properties
     @Property(str, notify=songColorBrightChanged)
     def songColorBright(self) -> str:
-        try:
-            color = QColor(self._songColorAvg)
-            h, s, l, _ = color.getHslF()
-            brighter_color = QColor.fromHslF(
-                h,
-                s,
-                min(1.0, l * 1.5),  # Increase lightness by 50%, cap at 1.0
-                1.0
-            )
-            return brighter_color.name(QColor.HexRgb)
-        except:
-            return "#FFFFFF"  # Return white as fallback
+        # Set with the rest of the (memoized) theme, never recomputed on read
+        return self._songColorBright
 
     @songColorBright.setter
     def songColorBright(self, value: str) -> None:
@@ -477,6 +447,17 @@ class InformationBinding(QObject):
         if self._songColorAvg != value:
             self._songColorAvg = value
             self.songColorAvgChanged.emit()
+
+    @Property('QVariantMap', notify=songPaletteChanged)
+    def songPalette(self) -> dict:
+        # dominant/vibrant/muted plus a readable '<name>_text' colour for each
+        return self._songPalette
+
+    @songPalette.setter
+    def songPalette(self, value: dict) -> None:
+        if self._songPalette != value:
+            self._songPalette = value
+            self.songPaletteChanged.emit()
             
     # Song Information
     @Property(str, notify=songTitleChanged)
@@ -577,6 +558,47 @@ class InformationBinding(QObject):
         if self._previousLyric != value:
             self._previousLyric = value
             self.previousLyricChanged.emit()
+
+    @Property(bool, notify=isPlayingChanged)
+    def isPlaying(self):
+        return self._isPlaying
+
+    @isPlaying.setter
+    def isPlaying(self, value):
+        if self._isPlaying != value:
+            self._isPlaying = value
+            self.isPlayingChanged.emit()
+
+    @Property('QVariantList', notify=currentLyricWordsChanged)
+    def currentLyricWords(self):
+        # Timed words of the current line, empty when it has no word timing
+        return self._currentLyricWords
+
+    @currentLyricWords.setter
+    def currentLyricWords(self, value):
+        if self._currentLyricWords != value:
+            self._currentLyricWords = value
+            self.currentLyricWordsChanged.emit()
+
+    @Property(int, notify=currentWordIndexChanged)
+    def currentWordIndex(self):
+        return self._currentWordIndex
+
+    @currentWordIndex.setter
+    def currentWordIndex(self, value):
+        if self._currentWordIndex != value:
+            self._currentWordIndex = value
+            self.currentWordIndexChanged.emit()
+
+    @Property(float, notify=lineProgressChanged)
+    def lineProgress(self):
+        return self._lineProgress
+
+    @lineProgress.setter
+    def lineProgress(self, value):
+        if self._lineProgress != value:
+            self._lineProgress = value
+            self.lineProgressChanged.emit()
             
     
     # Modifier Functions
@@ -584,7 +606,7 @@ class InformationBinding(QObject):
     def checkSongChange(self):
         """Check if the song has changed and reload lyrics if needed"""
         try:
-            playback = self._spotifyController.spotify.current_playback()
+            playback = self._spotifyController.playback_store.snapshot
             if not playback or not playback.get('item'):
                 return
 
@@ -604,7 +626,7 @@ class InformationBinding(QObject):
     def updateSongInformation(self):
         """Update current song information and check for song changes"""
         try:
-            playback = self._spotifyController.spotify.current_playback()
+            playback = self._spotifyController.playback_store.snapshot
             if not playback or not playback.get('item'):
                 return
 
@@ -633,40 +655,24 @@ class InformationBinding(QObject):
         except Exception as e:
             print(f"Error updating song information: {e}")
 
+    def _onPlayStateChanged(self, playback: Optional[dict]) -> None:
+        self.isPlaying = select_is_playing(playback)
+
+    # Transport: the store is patched in this frame, the API call follows
     @Slot()
     def pauseResume(self):
         """Pause or resume playback"""
-        try:
-            playback = self._spotifyController.spotify.current_playback()
-            if not playback:
-                return
-
-            if playback['is_playing']:
-                self._spotifyController.spotify.pause_playback()
-            else:
-                self._spotifyController.spotify.start_playback()
-
-        except Exception as e:
-            print(f"Error pausing/resuming playback: {e}")
+        self._transport.toggle()
     
     @Slot()
     def backSong(self):
-        """Go back to the previous song"""
-        try:
-            progress = self._spotifyController.spotify.current_playback()['progress_ms']
-            if progress['progress_ms'] > 3000:
-                self._spotifyController.spotify.seek_track(0)
-            self._spotifyController.spotify.previous_track()
-        except Exception as e:
-            print(f"Error going back to previous song: {e}")
+        """Restart the song, or go back to the previous one near its start"""
+        self._transport.previous()
     
     @Slot()
     def frontSong(self):
         """Skip to the next song"""
-        try:
-            self._spotifyController.spotify.next_track()
-        except Exception as e:
-            print(f"Error skipping to next song: {e}")
+        self._transport.next()
             
     @Slot()
     async def loadLyrics(self):
@@ -678,31 +684,46 @@ class InformationBinding(QObject):
             return
             
         try:
-            playback = self._spotifyController.spotify.current_playback()
+            self._applyLyrics(await self._spotifyController.getLyrics())
+        except Exception as e:
+            print(f"Error loading lyrics: {e}")
+            self.currentLyric = "Error loading lyrics"
 
-            lyrics_data = self._spotifyController.getLyrics()
+    def _applyLyrics(self, lyrics_data: Optional[dict]) -> None:
+        try:
             if lyrics_data and lyrics_data.get('synced'):
                 self._lyrics = lyrics_data['synced']
+                # Lyrics from the store come with their timeline already built
+                self._timeline = lyrics_data.get('timeline') or LyricsTimeline.from_synced(self._lyrics)
+                self._lyricIndex = None
                 
-                # Reset lyrics display
-                if hasattr(self, '_lyricTimer') and not self._lyricTimer.isActive():
-                    self._lyricTimer.start()
-                    
                 #reset lyrics
                 self.previousLyric = ""
                 self.currentLyric = "Loading lyrics..."
                 self.nextLyric = ""
+                self._resetKaraoke()
+
+                # Show the line for the current position and arm the next switch
+                self.updateLyricDisplay()
+                self._scheduleNextLyric()
             else:
                 self._lyrics = []
-                if hasattr(self, '_lyricTimer'):
-                    self._lyricTimer.stop()
+                self._timeline = LyricsTimeline()
+                self._lyricIndex = None
+                self.lyricsTimer.stop()
                 self.previousLyric = ""
                 self.currentLyric = "No lyrics available"
                 self.nextLyric = ""
+                self._resetKaraoke()
         except Exception as e:
             print(f"Error loading lyrics: {e}")
             self.currentLyric = "Error loading lyrics"
 
+    def _resetKaraoke(self) -> None:
+        self.currentLyricWords = []
+        self.currentWordIndex = -1
+        self.lineProgress = 0.0
+
     def setSpotifyController(self, controller):
         """Set the Spotify controller instance"""
         self._spotifyController = controller
@@ -720,40 +741,31 @@ class InformationBinding(QObject):
             if hasattr(self, '_is_moving') and self._is_moving:
                 print('"Skipping lyric update due to slider movement." (self._is_moving')
                 return
-            playback = self._spotifyController.spotify.current_playback()
-            if not playback or not self._lyrics:
+            # Read the shared snapshot, the event listener keeps it fresh
+            store = self._spotifyController.playback_store
+            timeline = self._timeline
+            if not store.snapshot or not timeline:
                 return
 
-            current_time = playback['progress_ms']
-            
             # Find current lyric position
-            current_index = -1
-            for i, lyric in enumerate(self._lyrics):
-                if lyric['time'] <= current_time:
-                    current_index = i
-                else:
-                    break
+            current_index = timeline.index_at(store.clock.position())
+            if current_index == self._lyricIndex:
+                return
+            self._lyricIndex = current_index
 
             if current_index >= 0:
-                # Set previous lyric
-                if current_index > 0:
-                    self.previousLyric = self._lyrics[current_index - 1]['words']
-                else:
-                    self.previousLyric = ""
-
-                # Set current lyric
-                self.currentLyric = self._lyrics[current_index]['words']
-
-                # Set next lyric
-                if current_index < len(self._lyrics) - 1:
-                    self.nextLyric = self._lyrics[current_index + 1]['words']
-                else:
-                    self.nextLyric = ""
+                self.previousLyric = timeline.line(current_index - 1)
+                self.currentLyric = timeline.line(current_index)
+                self.nextLyric = timeline.line(current_index + 1)
             else:
                 # Before first lyric
                 self.previousLyric = ""
-                self.currentLyric = self._lyrics[0]['words'] if self._lyrics else ""
-                self.nextLyric = self._lyrics[1]['words'] if len(self._lyrics) > 1 else ""
+                self.currentLyric = timeline.line(0)
+                self.nextLyric = timeline.line(1)
+            # Word highlight and line fill start over on every line
+            self.currentLyricWords = list(timeline.line_words(max(current_index, 0)))
+            self.currentWordIndex = -1
+            self.lineProgress = 0.0
 
         except Exception as e:
             print(f"Error updating lyrics display: {e}")
@@ -776,21 +788,6 @@ class InformationBinding(QObject):
         except Exception as e:
             print(f"Error updating playback info: {e}")
 
-    async def _update_cover_image(self, url):
-        try:
-            rounded_url = await self._processAndRoundImage(url)
-            if rounded_url:
-                self._songUrl = rounded_url
-                self.songUrlChanged.emit()
-                
-                # Update colors
-                avg_color = await self._spotifyController.get_average_hex_color(url)
-                if avg_color != self._songColorAvg:
-                    self._songColorAvg = avg_color
-                    self.songColorAvgChanged.emit()
-        except Exception as e:
-            print(f"Error updating cover image: {e}")
-
     async def on_playback_changed(self, playback_state):
         """This is your callback function that handles playback state changes"""
         if not playback_state:
@@ -803,39 +800,33 @@ class InformationBinding(QObject):
         except Exception as e:
             print(f"Error in playback change callback: {e}")
     
-    async def _process_cover_image(self, url):
-        if url != self._original_url:
-            self._original_url = url
-            # Process image asynchronously
-            rounded_url = await self._processAndRoundImage(url)
-            self._songUrl = rounded_url
-            self.songUrlChanged.emit()
-
-    def _cleanup_processor(self, processor):
-        if processor in self._image_processor:
-            processor.quit()
-            processor.wait()
-            self._image_processor.remove(processor)
-            processor.deleteLater()
-
     @Slot()
-    async def _update_progress(self):
+    def _update_progress(self):
         if not self._is_moving:
             try:
-                progress = await self._spotifyController.getPlaybackProgressPercentage()
+                clock = self._spotifyController.playback_store.clock
+                progress = clock.fraction
                 if progress != self._songPercent:
                     self._songPercent = progress
                     self.songPercentChanged.emit()
+                self._updateKaraoke(clock)
             except Exception as e:
                 print(f"Error updating progress: {e}")
 
+    def _updateKaraoke(self, clock) -> None:
+        # Word and line fill inside the line the lyrics timer switched to;
+        # two bisects within one line, and the setters only emit on change
+        index = self._lyricIndex
+        if index is None or index < 0 or not self._timeline:
+            return
+        position = clock.position()
+        self.currentWordIndex = self._timeline.word_index_at(index, position)
+        self.lineProgress = round(self._timeline.line_progress(index, position, clock.duration_ms), 3)
+
 
     def cleanup(self) -> None:
     # Stop timers first
-        
-        if hasattr(self, '_imageProcessor'):
-            self._imageProcessor.quit()
-            self._imageProcessor.wait()
+        self._prefetcher.cancel()
         
         if hasattr(self, '_lyricsThread'):
             self._lyricsThread.quit()
@@ -844,11 +835,9 @@ class InformationBinding(QObject):
         if hasattr(self, '_progressThread'):
             self._progressThread.quit()
             self._progressThread.wait()
-            
-        self._image_processor = None
-
 
-        # Clean up rounded image cache
+        # Covers are served from memory now; only remove rendered files
+        # left in the working directory by older versions
         try:
             cache_pattern = "rounded_cover_*.png"
             cache_files = list(Path().glob(cache_pattern))
@@ -895,6 +884,8 @@ async def main():
     try:
         # Set up QML engine
         engine = QQmlApplicationEngine()
+        # image://covers/... sources are decoded covers served from memory
+        engine.addImageProvider(CoverImageProvider.PROVIDER_ID, sp_controller.cover_images)
         controller = InformationBinding(sp_controller)
         engine.rootContext().setContextProperty("controller", controller)
 
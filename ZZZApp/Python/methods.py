@@ -1,16 +1,23 @@
 from rich import print
-from spotipy import Spotify
-from PIL import Image
+from spotipy import Spotify, SpotifyException
 import aiohttp
 import asyncio
-import requests
-from io import BytesIO
-import json
-import numpy as np
 from pathlib import Path
-from lrcup import LRCLib
 from typing import Optional, Dict, List, Union
 
+from PlaybackStore import PlaybackStore, select_cover_url
+from SpotifyWebClient import AsyncSpotifyClient
+from CoverImages import CoverCache, CoverFetcher, CoverImageProvider
+from ColorPalette import extract_palette
+from ThemeCache import ThemeCache, theme_key
+from LyricsStore import LyricsStore
+from LyricsResolver import LyricsResolver
+from LyricsProviders import LRCLibProvider
+from LibrarySync import LibrarySync
+from SearchIndex import SearchIndex
+from PlaylistCatalog import PlaylistCatalog
+from PlaylistWriteQueue import PlaylistWriteQueue
+
 
 # catching errors
 class InvalidSearchError(Exception):
@@ -31,7 +38,7 @@ class SpotifyController:
     # playing tracks, managing playlists, and controlling playback.
     
     
-    def __init__(self, spotify: Spotify):
+    def __init__(self, spotify: Spotify, playback_ttl: float = 5.0):
         # 
         # Notes:
         # contructor class, is run the moment that sp_controller = SpotifyController(sp) in main
@@ -39,61 +46,82 @@ class SpotifyController:
         # Initialize the SpotifyController.
         #
         # Args:
-        #     spotify (Spotify): An authenticated Spotify client object.
+        #     spotify (Spotify): An authenticated Spotify client object, only its
+        #         auth manager is used; requests go through the async client.
+        #     playback_ttl (float): Seconds a shared playback snapshot stays fresh.
         # 
         self.spotify = spotify
-        self.lyrics_cache = {}
-        self.lrclib = LRCLib()
+        self.session = None
+        self.api = AsyncSpotifyClient(spotify.auth_manager)
+        self.cover_cache = CoverCache()
+        self.covers = CoverFetcher(self.api, self.cover_cache)
+        self.cover_images = CoverImageProvider()
+        # Longest side, in device pixels, covers are displayed at; set by the UI
+        self.cover_size = None
+        self.themes = ThemeCache()
+        self.playback_store = PlaybackStore(self.api, ttl=playback_ttl)
+        # Imports the legacy lyrics/*.json files on first run
+        self.lyrics_store = LyricsStore(migrate_from=Path(__file__).parent / 'lyrics')
+        # Remote providers race each other, the first synced result wins
+        self.lyrics = LyricsResolver(self.lyrics_store)
+        self.lyrics.add_provider('LRCLib', LRCLibProvider(self.api), timeout=5.0)
+        self.lyrics.add_provider('Fallback', self._get_fallback_lyrics, timeout=5.0)
+        # Saved tracks, indexed locally and synced incrementally
+        self.library = LibrarySync(self.api)
+        # Name -> URI lookups over the library, API on a miss
+        self.search_index = SearchIndex()
+        self._indexed_revision = None
+        # All playlists by ID and name, plus the user profile
+        self.playlists = PlaylistCatalog(self.api)
+        # Playlist additions and library saves, batched and sent in the background
+        self.writes = PlaylistWriteQueue(self.api, self.playlists)
         self.default_device_id = None
     
     async def setup(self):
         """Async initialization method"""
         print("Running setup method")  
-        self.session = aiohttp.ClientSession()
+        # Pooled keep-alive session shared by every API and image request
+        self.session = self.api.create_session()
+        # Writes left over from the last session
+        self.writes.schedule(self.writes.flush_delay)
         # Initialize any other async components here
         try:
-            # Test the connection
-            self.spotify.current_playback()
+            # Test the connection and seed the shared playback snapshot
+            await self.playback_store.refresh()
         except Exception as e:
             print(f"Error during setup: {e}")
         return self
 
     async def cleanup(self):
         """Cleanup method to close the session"""
+        # Pending writes need the session, send them first
+        await self.writes.close()
+        self.themes.close()
         if self.session:
             print('closing')
             await self.session.close()
 
     
-    async def getLyrics(self) -> Optional[Dict[str, Union[List[Dict], str, None]]]:
+    async def getLyrics(self, playback: Optional[Dict] = None) -> Optional[Dict[str, Union[List[Dict], str, None]]]:
         try:
-            # Get current track info
-            current_track = self.spotify.current_playback()
+            # Get current track info, unless the caller already has the snapshot
+            current_track = playback or await self.playback_store.get()
             if not current_track or not current_track.get('item'):
                 print("No track currently playing")
                 return None
                 
+            track_id = current_track['item'].get('id')
             track_info = {
+                'id': track_id,
                 'name': current_track['item']['name'],
                 'artist': current_track['item']['artists'][0]['name'],
+                'album': current_track['item'].get('album', {}).get('name'),
                 'duration': current_track['item']['duration_ms']
             }
             
-            # Check cache first
-            cache_key = f"{track_info['artist']} - {track_info['name']}"
-            if cache_key in self.lyrics_cache:
-                print("Found lyrics in cache")
-                return self.lyrics_cache[cache_key]
-
-            # Try sources in order of preference
-            lyrics = (
-                self._get_lrclib_lyrics(track_info) or
-                self._get_local_lyrics(track_info)
-            )
-            
+            # Local store first (it also remembers tracks without lyrics), then the providers
+            lyrics = await self.lyrics.resolve(track_id, track_info)
             if lyrics:
-                # Cache the result
-                self.lyrics_cache[cache_key] = lyrics
                 return lyrics
                 
             print(f"No lyrics found for: {track_info['name']} by {track_info['artist']}")
@@ -103,70 +131,6 @@ class SpotifyController:
             print(f"Error in getLyrics: {e}")
             return None
 
-    async def _get_lrclib_lyrics(self, track_info: Dict) -> Optional[Dict]:
-        """Try to get synced lyrics from LRCLib"""
-        try:
-            results = self.lrclib.search(
-                track=track_info['name'],
-                artist=track_info['artist']
-            )
-            
-            if results and len(results) > 0:
-                synced_lyrics = results[0]["syncedLyrics"]
-                parsed_lyrics = []
-                
-                for line in synced_lyrics.split('\n'):
-                    if line.strip() and '[' in line:
-                        try:
-                            time_str = line[line.find('[')+1:line.find(']')]
-                            text = line[line.find(']')+1:].strip()
-                            
-                            # Convert time format [mm:ss.xx] to milliseconds
-                            mins, secs = time_str.split(':')
-                            time_ms = (int(mins) * 60 + float(secs)) * 1000
-                            
-                            parsed_lyrics.append({
-                                'time': int(time_ms),
-                                'words': text
-                            })
-                        except Exception as e:
-                            print(f"Error parsing line '{line}': {e}")
-                            continue
-                
-                if parsed_lyrics:
-                    print("Found lyrics in LRCLib")
-                    return {
-                        'synced': parsed_lyrics,
-                        'plain': '\n'.join(line['words'] for line in parsed_lyrics),
-                        'provider': 'LRCLib',
-                        'track_info': track_info
-                    }
-                    
-        except Exception as e:
-            print(f"LRCLib lyrics fetch failed: {e}")
-        return None
-    
-    async def _get_local_lyrics(self, track_info: Dict) -> Optional[Dict]:
-        """Try to get lyrics from local storage"""
-        try:
-            lyrics_path = Path(__file__).parent / 'lyrics'
-            filename = f"{track_info['artist']} - {track_info['name']}.json"
-            lyrics_file = lyrics_path / filename.replace('/', '_')
-            
-            if lyrics_file.exists():
-                with open(lyrics_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return {
-                        'synced': data.get('synced'),
-                        'plain': data.get('plain'),
-                        'provider': 'Local',
-                        'track_info': track_info
-                    }
-                    
-        except Exception as e:
-            print(f"Local lyrics fetch failed: {e}")
-        return None
-            
     async def _get_fallback_lyrics(self, track_info: Dict) -> Optional[Dict]:
         """Try to get unsynced lyrics from fallback sources"""
         try:
@@ -177,89 +141,69 @@ class SpotifyController:
             print(f"Fallback lyrics fetch failed: {e}")
         return None
             
-    async def saveLyrics(self, lyrics_data: Dict) -> bool:
+    async def get_cover_source(self, image_url: str) -> Optional[str]:
         """
-        Save lyrics to local storage
-        
+        Gets a QML image source for a cover, served from memory.
+
         Args:
-            lyrics_data: Dictionary containing lyrics data
-        
+            image_url (str): Cover URL
+
         Returns:
-            bool: True if saved successfully
+            str: image://covers/<key> URL, or None if the cover could not be loaded
+        """
+        cover = await self.covers.fetch(image_url, self.cover_size)
+        if cover is None:
+            return None
+        return self.cover_images.publish(cover)
+
+    async def get_palette(self, image_url: str) -> Optional[Dict[str, str]]:
+        """
+        Extracts a dominant/vibrant/muted palette from a cover.
+
+        Args:
+            image_url (str): Cover URL, shares the download with the other stages
+
+        Returns:
+            dict: Hex colours from ColorPalette.extract_palette, or None on failure
         """
         try:
-            if not lyrics_data or 'track_info' not in lyrics_data:
-                return False
-                
-            lyrics_path = Path(__file__).parent / 'lyrics'
-            lyrics_path.mkdir(exist_ok=True)
-            
-            track_info = lyrics_data['track_info']
-            filename = f"{track_info['artist']} - {track_info['name']}.json"
-            lyrics_file = lyrics_path / filename.replace('/', '_')
-            
-            with open(lyrics_file, 'w', encoding='utf-8') as f:
-                json.dump(lyrics_data, f, ensure_ascii=False, indent=2)
-                
-            print(f"Lyrics saved to: {lyrics_file}")
-            return True
-            
+            # Same size as the displayed cover, so the two share one decode
+            cover = await self.covers.fetch(image_url, self.cover_size)
+            if cover is None:
+                return None
+
+            # k-means over a downsampled view, a few ms; kept off the event loop
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, extract_palette, cover.pixels())
         except Exception as e:
-            print(f"Error saving lyrics: {e}")
-            return False
+            print(f"Error extracting palette: {str(e)}")
+            return None
 
+    async def get_theme(self, image_url: str, album_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Gets the derived colour theme of a cover, memoized per album.
 
+        Args:
+            image_url (str): Cover URL, only downloaded on a theme cache miss
+            album_id (str, optional): Album ID; tracks of one album share a theme
 
-    async def get_average_hex_color(self, image_url):
-            try:
-                # Download image from URL
-                response = requests.get(image_url)
-                img = Image.open(BytesIO(response.content))
-                
-                # Convert image to RGB if it isn't
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Convert to numpy array for faster processing
-                img_array = np.array(img)
-                
-                # Calculate average color
-                average_color = np.mean(img_array, axis=(0,1))
-                
-                # Convert to integers
-                r, g, b = [int(x) for x in average_color]
-                
-                # Convert to hex
-                hex_color = f"#{r:02x}{g:02x}{b:02x}"
-                return hex_color.upper()  # Return uppercase hex
-                
-            except Exception as e:
-                print(f"Error processing image: {str(e)}")
-                
-            
-    async def getPlaybackProgressPercentage(self) -> float:
-        """
-        Gets the current playback progress as a percentage.
-    
         Returns:
-            float: The percentage (0-100) of the way through the current track.
-                   Returns 0 if no track is playing.
+            dict: 'avg' and 'bright' hex colours plus the full 'palette',
+                  or None if the cover could not be processed
         """
-        current_track = self.spotify.current_user_playing_track()
-        
-        if current_track is None or not current_track['is_playing']:
-            return 0.0
-            
-        progress_ms = current_track['progress_ms']
-        total_ms = current_track['item']['duration_ms']
-        
-        # Calculate percentage and round to 2 decimal places
-        percentage = progress_ms / total_ms
-        
-        return percentage
-    
-    
+        key = theme_key(album_id, image_url)
+        theme = self.themes.get(key)
+        if theme is not None:
+            return theme
 
+        palette = await self.get_palette(image_url)
+        if palette is None:
+            return None
+        # Dominant colour for backgrounds, vibrant for accents and lyrics
+        theme = {'avg': palette['dominant'], 'bright': palette['vibrant'], 'palette': palette}
+        self.themes.put(key, theme)
+        return theme
+            
     async def saveLyrics(self, lyrics: str, track_name: str = None, artist_name: str = None) -> bool:
         """
         Save lyrics to local storage for offline access
@@ -273,25 +217,24 @@ class SpotifyController:
             bool: True if saved successfully, False otherwise
         """
         try:
+            track_id = duration = None
             if not track_name or not artist_name:
-                current_track = self.spotify.current_playback()
+                current_track = await self.playback_store.get()
                 if not current_track or not current_track.get('is_playing'):
                     print("No track is currently playing.")
                     return False
             
+                track_id = current_track['item'].get('id')
                 track_name = current_track['item']['name']
                 artist_name = current_track['item']['artists'][0]['name']
+                duration = current_track['item']['duration_ms']
 
-            lyrics_path = Path(__file__).parent / 'lyrics'
-            lyrics_path.mkdir(exist_ok=True)
-            
-            filename = f"{artist_name} - {track_name}.txt".replace('/', '_')
-            lyrics_file = lyrics_path / filename
-            
-            with open(lyrics_file, 'w', encoding='utf-8') as f:
-                f.write(lyrics)
-                
-            print(f"Lyrics saved to: {lyrics_file}")
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self.lyrics_store.put,
+                track_id, artist_name, track_name, duration, {'plain': lyrics, 'provider': 'Local'}
+            )
+            print(f"Lyrics saved for: {artist_name} - {track_name}")
             return True
             
         except Exception as e:
@@ -311,38 +254,48 @@ class SpotifyController:
         #     None
         # 
         # Get the current song
-        current_track = self.spotify.current_user_playing_track()
-        if current_track is None:
+        current_track = await self.playback_store.get()
+        if current_track is None or not current_track['item']:
             print("[bold red]No track is currently playing.[/bold red]")
             return
 
         track_uri = current_track['item']['uri']
         track_name = current_track['item']['name']
 
-        # Get user's playlists
-        playlists = self.spotify.current_user_playlists()
-        
-        # Find the specified playlist
-        target_playlist = next((playlist for playlist in playlists['items'] if playlist['name'].lower() == playlist_name.lower()), None)
+        # Find the specified playlist; exact names only, never add to a near miss
+        target_playlist = await self.playlists.find(playlist_name)
         
         if target_playlist is None:
             print(f"[bold red]Playlist '{playlist_name}' not found.[/bold red]")
             return
+        if not await self.playlists.can_edit(target_playlist):
+            print(f"[bold red]Playlist '{playlist_name}' belongs to someone else.[/bold red]")
+            return
 
-        # Add the track to the playlist
-        self.spotify.user_playlist_add_tracks(self.spotify.me()['id'], target_playlist['id'], [track_uri])
+        # Queued, sent in one batch with other additions to the same playlist
+        self.writes.add_to_playlist(target_playlist['id'], [track_uri])
         print(f"[bold green]Added '{track_name}' to playlist '{playlist_name}'.[/bold green]")
 
+    async def save_current_song(self) -> None:
+        # 
+        # Saves the currently playing song to the user's library.
+
+        # Returns:
+        #     None
+        # 
+        current_track = await self.playback_store.get()
+        if current_track is None or not current_track['item']:
+            print("[bold red]No track is currently playing.[/bold red]")
+            return
+
+        self.writes.save_tracks([current_track['item']['uri']])
+        print(f"[bold green]Saved '{current_track['item']['name']}' to your library.[/bold green]")
+
     async def getCurrentPlayback(self):
         """Get current playback state asynchronously"""
         try:
-            # Run the synchronous Spotipy call in a thread pool
-            loop = asyncio.get_event_loop()
-            current_playback = await loop.run_in_executor(
-                None, 
-                self.spotify.current_playback
-            )
-            return current_playback
+            # Shared snapshot, only hits the API once the store TTL has expired
+            return await self.playback_store.get()
         except Exception as e:
             print(f"Error getting current playback: {e}")
             return None
@@ -359,7 +312,7 @@ class SpotifyController:
         #         - is_playing: bool
         #     Returns None if no song is playing or on error
         try:
-            current_track = self.spotify.current_user_playing_track()
+            current_track = await self.playback_store.get()
             
             if current_track and current_track['item']:
                 track_item = current_track['item']
@@ -392,7 +345,7 @@ class SpotifyController:
             # Returns:
             #     None
             # 
-            self.spotify.previous_track(device_id=self.default_device_id)
+            await self.api.previous_track(device_id=self.default_device_id)
 
     async def get_album_uri(self, name: str) -> str:
             # 
@@ -407,10 +360,7 @@ class SpotifyController:
             # Raises:
             #     InvalidSearchError: If no album is found with the given name.
             # 
-            results = self.spotify.search(q=name, type="album")
-            if not results["albums"]["items"]:
-                raise InvalidSearchError(f"No album found with name: {name}")
-            return results["albums"]["items"][0]["uri"]
+            return await self._lookup_uri('album', name)
 
     async def get_track_uri(self, name: str) -> str:
             # 
@@ -425,10 +375,7 @@ class SpotifyController:
             # Raises:
             #     InvalidSearchError: If no track is found with the given name.
             # 
-            results = self.spotify.search(q=name, type="track")
-            if not results["tracks"]["items"]:
-                raise InvalidSearchError(f"No track found with name: {name}")
-            return results["tracks"]["items"][0]["uri"]
+            return await self._lookup_uri('track', name)
 
     async def get_artist_uri(self, name: str) -> str:
             # 
@@ -443,10 +390,80 @@ class SpotifyController:
             # Raises:
             #     InvalidSearchError: If no artist is found with the given name.
             # 
-            results = self.spotify.search(q=name, type="artist")
-            if not results["artists"]["items"]:
-                raise InvalidSearchError(f"No artist found with name: {name}")
-            return results["artists"]["items"][0]["uri"]
+            return await self._lookup_uri('artist', name)
+
+    async def get_playlist_uri(self, name: str) -> str:
+            # 
+            # Returns the Spotify URI of one of the user's playlists, their own first.
+
+            # Args:
+            #     name (str): The name of the playlist to search for.
+
+            # Returns:
+            #     str: The Spotify URI of the best matching playlist.
+
+            # Raises:
+            #     InvalidSearchError: If no playlist is found with the given name.
+            # 
+
+            # Only the user's own and followed playlists; a public search would
+            # happily return a stranger's playlist of the same name
+            playlist = await self.playlists.find(name)
+            if playlist is None:
+                raise InvalidSearchError(f"No playlist found with name: {name}")
+            return playlist['uri']
+
+    async def _lookup_uri(self, kind: str, name: str) -> str:
+        # Exact library names first, then one memoized API search; near
+        # matches from the library only when the search finds nothing
+        await self._indexLibrary()
+        entry = self.search_index.find(kind, name, fuzzy=False)
+        if entry is not None:
+            return entry['uri']
+
+        try:
+            results = await self.api.search(q=name, type=kind)
+        except SpotifyException as e:
+            entry = self.search_index.find(kind, name)
+            if entry is None:
+                raise
+            print(f"[bold yellow]Search failed ({e}), using the closest library match[/bold yellow]")
+            return entry['uri']
+        items = [item for item in (results.get(f"{kind}s") or {}).get("items", []) if item]
+        if not items:
+            entry = self.search_index.find(kind, name)
+            if entry is None:
+                raise InvalidSearchError(f"No {kind} found with name: {name}")
+            return entry['uri']
+        self.search_index.remember(kind, name, items[0]['name'], items[0]['uri'])
+        return items[0]['uri']
+
+    async def _indexLibrary(self) -> None:
+        # An empty index waits for the first sync; otherwise the sync runs in
+        # the background and lookups answer from what is indexed already
+        loop = asyncio.get_event_loop()
+        sync = self.library.sync_in_background()
+        if sync is not None and not await loop.run_in_executor(None, self.library.count):
+            await asyncio.shield(sync)
+        if self._indexed_revision == self.library.revision:
+            return
+        self._indexed_revision = self.library.revision
+        # Reading and indexing the whole library takes a while, only the
+        # swap of the finished tables happens on the loop
+        for kind, tables in (await loop.run_in_executor(None, self._buildLibraryIndex)).items():
+            self.search_index.install(kind, tables)
+
+    def _buildLibraryIndex(self) -> Dict[str, tuple]:
+        tracks = self.library.tracks()
+        return {
+            'track': self.search_index.build((track['name'], track['uri']) for track in tracks),
+            'album': self.search_index.build(
+                (track['album'], f"spotify:album:{track['album_id']}") for track in tracks if track['album_id']
+            ),
+            'artist': self.search_index.build(
+                (track['artist'], f"spotify:artist:{track['artist_id']}") for track in tracks if track['artist_id']
+            ),
+        }
 
     async def play_artist(self, uri: str) -> Spotify:
         # 
@@ -458,7 +475,7 @@ class SpotifyController:
         # Returns:
         #     Spotify: The Spotify client object.
         # 
-        self.spotify.start_playback(context_uri=uri, device_id=self.default_device_id)
+        await self.api.start_playback(context_uri=uri, device_id=self.default_device_id)
         return self.spotify
 
     async def play_playlist(self, playlist_id: str) -> Spotify:
@@ -471,7 +488,7 @@ class SpotifyController:
         # Returns:
         #     Spotify: The Spotify client object.
         # 
-        self.spotify.start_playback(context_uri=f"spotify:playlist:{playlist_id}", device_id=self.default_device_id)
+        await self.api.start_playback(context_uri=f"spotify:playlist:{playlist_id}", device_id=self.default_device_id)
         return self.spotify
 
     async def next_track(self) -> Spotify:
@@ -481,7 +498,7 @@ class SpotifyController:
         # Returns:
         #     Spotify: The Spotify client object.
         # 
-        self.spotify.next_track(device_id=self.default_device_id)
+        await self.api.next_track(device_id=self.default_device_id)
         return self.spotify
 
     async def pause_track(self) -> Spotify:
@@ -495,7 +512,7 @@ class SpotifyController:
         #     If the track is already paused, a message will be printed.
         # 
         try:
-            self.spotify.pause_playback(device_id=self.default_device_id)
+            await self.api.pause_playback(device_id=self.default_device_id)
             return self.spotify
         except Exception as e:
             if "Player command failed: Restriction violated" in str(e):
@@ -515,7 +532,7 @@ class SpotifyController:
         #     If the track is already playing, a message will be printed.
         # 
         try:
-            self.spotify.start_playback(device_id=self.default_device_id)
+            await self.api.start_playback(device_id=self.default_device_id)
             return self.spotify
         except Exception as e:
             if "Player command failed: Restriction violated" in str(e):
@@ -534,7 +551,7 @@ class SpotifyController:
         # Note:
         #     If there's no active playback session, it returns False.
         # 
-        playback_state = self.spotify.current_playback()
+        playback_state = await self.playback_store.get()
         if playback_state is not None:
             return playback_state['shuffle_state']
         else:
@@ -549,22 +566,14 @@ class SpotifyController:
             str: URL of the album cover image. Returns empty string if no track is playing
                 or no image is available.
         """
-        current_track = self.spotify.current_user_playing_track()
+        current_track = await self.playback_store.get()
         
         if current_track is None or not current_track['item']:
             return ""
             
-        # Get album images array (contains different sizes)
-        images = current_track['item']['album']['images']
-        
-        if not images:
-            return ""
-            
-        # First image is typically the largest resolution
-        # images[0] = large
-        # images[1] = medium
-        # images[2] = small
-        return images[0]['url']    
+        # Smallest variant that is still sharp at the displayed size
+        # (images are 640, 300 and 64 px wide, largest first)
+        return select_cover_url(current_track, self.cover_size) or ""
 
     async def shuffle(self, state: str = None) -> None:
         # 
@@ -580,7 +589,7 @@ class SpotifyController:
         # Note:
         #     Prints a message indicating the new shuffle state.
         # 
-        current_state = self.is_shuffle_on()
+        current_state = await self.is_shuffle_on()
         
         if state is None:
             # Toggle shuffle
@@ -590,7 +599,7 @@ class SpotifyController:
             new_state = state.lower() == 'on'
         
         if new_state != current_state:
-            self.spotify.shuffle(new_state, device_id=self.default_device_id)
+            await self.api.shuffle(new_state, device_id=self.default_device_id)
             print(f"[bold green]Shuffle {'enabled' if new_state else 'disabled'}.[/bold green]")
         else:
             print(f"[bold yellow]Shuffle is already {'on' if new_state else 'off'}.[/bold yellow]")
@@ -608,7 +617,7 @@ class SpotifyController:
         # Note:
         #     Prints a message confirming the new volume level.
         # 
-        self.spotify.volume(volume, device_id=self.default_device_id)
+        await self.api.volume(volume, device_id=self.default_device_id)
         print(f"[bold green]Volume set to {volume}%[/bold green]")
         return self.spotify
 
@@ -623,11 +632,11 @@ class SpotifyController:
         #     Prints a message indicating the new repeat mode state.
         #     If there's no active playback session, a message will be printed.
         # 
-        playback = self.spotify.current_playback()
+        playback = await self.playback_store.get()
         if playback:
             current_state = playback['repeat_state']
             new_state = 'track' if current_state != 'track' else 'off'
-            self.spotify.repeat(new_state, device_id=self.default_device_id)
+            await self.api.repeat(new_state, device_id=self.default_device_id)
             print(f"[bold green]Repeat mode set to: {new_state}[/bold green]")
         else:
             print("[bold yellow]No active playback session.[/bold yellow]")
@@ -647,7 +656,7 @@ class SpotifyController:
         #     Prints a message confirming the new shuffle state.
         # 
         state_bool = state.lower() == 'on'
-        self.spotify.shuffle(state_bool, device_id=self.default_device_id)
+        await self.api.shuffle(state_bool, device_id=self.default_device_id)
         print(f"[bold green]Shuffle {'enabled' if state_bool else 'disabled'}.[/bold green]")
         return self.spotify
 
@@ -659,21 +668,13 @@ class SpotifyController:
         #     list: A list of strings, each containing a track name and its artist.
 
         # Note:
-        #     This method handles pagination to retrieve all saved tracks.
+        #     Reads the local library index; only tracks saved since the last
+        #     sync are fetched from Spotify.
         # 
-        tracks = []
-        results = self.spotify.current_user_saved_tracks(limit=50)
-        
-        while results:
-            for item in results['items']:
-                track = item['track']
-                tracks.append(f"{track['name']} by {track['artists'][0]['name']}")
-            if results['next']:
-                results = self.spotify.next(results)
-            else:
-                results = None
-        
-        return tracks
+        await self.library.sync()
+        loop = asyncio.get_event_loop()
+        tracks = await loop.run_in_executor(None, self.library.tracks)
+        return [f"{track['name']} by {track['artist']}" for track in tracks]
 
     async def init_default_device(self, local_device) -> str:
         # Initializes the default device for playback.
@@ -688,7 +689,7 @@ class SpotifyController:
         #     This method searches for available devices and sets the default device
         #     based on the provided local device information.
         print('methods line 659')
-        results = self.spotify.devices()
+        results = await self.api.devices()
         print('methods line 659')
         
         
@@ -23,6 +23,8 @@ Rectangle {
         Text {
             id: currentLine
             width: parent.width
+            // Lines with word timing are drawn word by word below
+            visible: controller.currentLyricWords.length === 0
             color: controller.songColorBright
             font.pixelSize: 24
             font.bold: true
@@ -41,6 +43,38 @@ Rectangle {
             }
         }
 
+        // Karaoke line: sung words are fully opaque, the rest dimmed
+        Flow {
+            id: currentWords
+            width: parent.width
+            visible: !currentLine.visible
+
+            Repeater {
+                model: controller.currentLyricWords
+
+                Text {
+                    color: controller.songColorBright
+                    opacity: index <= controller.currentWordIndex ? 1.0 : 0.4
+                    font.pixelSize: 24
+                    font.bold: true
+                    text: modelData
+
+                    Behavior on opacity {
+                        NumberAnimation { duration: 120 }
+                    }
+                }
+            }
+        }
+
+        Rectangle {
+            id: lineProgressBar
+            width: parent.width * controller.lineProgress
+            height: 2
+            radius: 1
+            color: controller.songColorBright
+            opacity: 0.6
+        }
+
         Text {
             id: nextLine
             width: parent.width
@@ -123,13 +123,34 @@ Rectangle {
                     id: image1
                     width: 235
                     height: 235
-                    visible: true
                     anchors.verticalCenter: parent.verticalCenter
                     source: controller.songUrl
                     anchors.verticalCenterOffset: 0
                     anchors.horizontalCenterOffset: 0
                     anchors.horizontalCenter: parent.horizontalCenter
                     fillMode: Image.PreserveAspectFit
+                    // Drawn through coverEffect with rounded corners
+                    visible: false
+                }
+
+                Rectangle {
+                    id: coverMask
+                    anchors.fill: image1
+                    radius: rectangle2.radius
+                    visible: false
+                    antialiasing: true
+                    layer.enabled: true
+                    layer.smooth: true
+                }
+
+                MultiEffect {
+                    id: coverEffect
+                    anchors.fill: image1
+                    source: image1
+                    maskEnabled: true
+                    maskSource: coverMask
+                    maskThresholdMin: 0.5
+                    maskSpreadAtMin: 1.0
                 }
             }
 
@@ -274,7 +295,7 @@ Rectangle {
             RoundButton {
                 id: resumeButton
                 x: 673
-                text: "+"
+                text: controller.isPlaying ? "⏸" : "▶"
 
                 Connections {
                     target: resumeButton